@@ -0,0 +1,289 @@
+from collections.abc import Mapping
+from itertools import product
+import numpy as np
+
+# an array network is a discrete network on all states of
+# {0,...,m1}x...x{0,...,mn} stored as a table of image codes.
+# States are numbered in the order of discrete_states(ms)
+# (mixed radix, last component varying fastest),
+# and table[code(x)] = code(f[x]).
+
+### state codes
+
+def n_states(ms):
+    return int(np.prod([m+1 for m in ms], dtype=np.int64))
+
+
+def code_dtype(ms):
+    return np.uint32 if n_states(ms) <= 2**32 else np.int64
+
+
+def weights(ms):
+    # weight of component i in the code of a state
+    w = [1]*len(ms)
+    for i in range(len(ms)-2, -1, -1):
+        w[i] = w[i+1]*(ms[i+1]+1)
+    return np.array(w, dtype=np.int64)
+
+
+def state_code(x, ms):
+    return int(sum(int(xi)*int(wi) for xi, wi in zip(x, weights(ms))))
+
+
+def code_state(c, ms):
+    return tuple(int(v) for v in decode(np.array([c]), ms)[0])
+
+
+def encode(xs, ms):
+    # codes of the states in the rows of xs
+    return np.asarray(xs, dtype=np.int64).dot(weights(ms))
+
+
+def decode(codes, ms):
+    # states (one per row) of the given codes
+    codes = np.asarray(codes, dtype=np.int64)
+    return (codes[:, None] // weights(ms)) % np.array([m+1 for m in ms], dtype=np.int64)
+
+
+def level(codes, i, ms):
+    # i-th component of the states of the given codes
+    codes = np.asarray(codes, dtype=np.int64)
+    if all(m==1 for m in ms):
+        return (codes >> (len(ms)-1-i)) & 1
+    return (codes // weights(ms)[i]) % (ms[i]+1)
+
+
+### integer-coded Boolean states
+# the code of a Boolean state is an n-bit integer,
+# component i corresponding to the bit 1 << (n-1-i)
+
+def bit(i, n):
+    return 1 << (n-1-i)
+
+
+def neigh_code(c, i, n):
+    return c ^ bit(i, n)
+
+
+def diff_inds_code(c, d, n):
+    return [i for i in range(n) if (c ^ d) & bit(i, n)]
+
+
+def cube_codes(c, I, n):
+    # codes of the cube c[I], in increasing order
+    mask = sum(bit(i, n) for i in set(I))
+    base, s = c & ~mask, 0
+    while True:
+        yield base | s
+        if s==mask: return
+        s = ((s | ~mask) + 1) & mask
+
+
+### array networks
+
+class ArrayNetwork(Mapping):
+    # read-only mapping state -> image backed by a table of image codes,
+    # can be passed to all functions accepting a network as a dict
+
+    def __init__(self, ms, table):
+        self.ms = [int(m) for m in ms]
+        self.table = np.asarray(table)
+        if self.table.shape != (n_states(self.ms),):
+            raise ValueError("Table size does not match levels {}.".format(self.ms))
+
+    def __getitem__(self, x):
+        if x not in self:
+            raise KeyError(x)
+        return code_state(self.table[state_code(x, self.ms)], self.ms)
+
+    def __contains__(self, x):
+        return (isinstance(x, tuple) and len(x)==len(self.ms) and
+                all(0<=x[i]<=self.ms[i] for i in range(len(x))))
+
+    def __iter__(self):
+        return product(*[tuple(range(m+1)) for m in self.ms])
+
+    def __len__(self):
+        return len(self.table)
+
+    def __eq__(self, other):
+        if isinstance(other, ArrayNetwork):
+            return self.ms==other.ms and np.array_equal(self.table, other.table)
+        return Mapping.__eq__(self, other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ArrayNetwork({}, {})".format(self.ms, self.table)
+
+    def codes(self):
+        return np.arange(len(self.table), dtype=np.int64)
+
+    def states(self):
+        return decode(self.codes(), self.ms)
+
+    def images(self):
+        return decode(self.table, self.ms)
+
+
+def boolean_array_network(n, table):
+    # Boolean network given by the list of image codes
+    return ArrayNetwork([1]*n, np.asarray(table, dtype=code_dtype([1]*n)))
+
+
+def is_boolean(f):
+    return all(m==1 for m in f.ms)
+
+
+def array_network(f, ms=None):
+    # convert a network given as a dict defined on all states
+    if isinstance(f, ArrayNetwork):
+        return f
+    if not ms:
+        ks = list(f.keys())
+        ms = [max(x[i] for x in ks) for i in range(len(ks[0]))]
+    if len(f)!=n_states(ms):
+        raise ValueError("Array networks must be defined on all states.")
+    xs = np.array(list(f.keys()), dtype=np.int64)
+    fxs = np.array(list(f.values()), dtype=np.int64)
+    table = np.empty(len(f), dtype=code_dtype(ms))
+    table[encode(xs, ms)] = encode(fxs, ms)
+    return ArrayNetwork(ms, table)
+
+
+def to_dict(f):
+    states = map(tuple, f.states().tolist())
+    images = map(tuple, f.images().tolist())
+    return dict(zip(states, images))
+
+
+### vectorized analyses
+
+def to_stepwise_array(f):
+    xs = f.states()
+    fxs = xs + np.sign(f.images() - xs)
+    return ArrayNetwork(f.ms, encode(fxs, f.ms).astype(f.table.dtype))
+
+
+def to_asymptotic_array(f):
+    xs, fxs = f.states(), f.images()
+    ms = np.array(f.ms, dtype=np.int64)
+    fxs = np.where(fxs > xs, ms, np.where(fxs < xs, 0, xs))
+    return ArrayNetwork(f.ms, encode(fxs, f.ms).astype(f.table.dtype))
+
+
+def fixed_point_codes(f):
+    return np.flatnonzero(f.table == f.codes())
+
+
+def sd_edges(f):
+    # edges of the synchronous dynamics as arrays of codes
+    return f.codes(), f.table.astype(np.int64)
+
+
+def ad_successor_codes(f, c):
+    # successors of the state of code c in the asynchronous dynamics
+    if is_boolean(f):
+        n, moving = len(f.ms), int(f.table[c]) ^ c
+        return [c ^ bit(i, n) for i in range(n) if moving & bit(i, n)]
+    x, fx, w = code_state(c, f.ms), f[code_state(c, f.ms)], weights(f.ms)
+    return [c + (1 if fx[j]>x[j] else -1)*int(w[j]) for j in range(len(x)) if fx[j]!=x[j]]
+
+
+def successor_codes(f, synch=False, scan=False):
+    # function mapping a code to the codes of its successors.
+    # The table is read entry by entry, or, if scan=True (for searches
+    # visiting all states), first converted to a list
+    if scan:
+        image = f.table.tolist().__getitem__
+    else:
+        image = lambda c: int(f.table[c])
+    if synch:
+        return lambda c: [image(c)]
+    if is_boolean(f):
+        bits = [bit(i, len(f.ms)) for i in range(len(f.ms))]
+        return lambda c: [c ^ b for b in bits if (image(c) ^ c) & b]
+    wr = list(zip(weights(f.ms).tolist(), [m+1 for m in f.ms]))
+    def succ(c):
+        fc = image(c)
+        return [c + (w if fc//w % r > c//w % r else -w) for w, r in wr if fc//w % r != c//w % r]
+    return succ
+
+
+def ad_edges(f):
+    # edges of the asynchronous dynamics as arrays of codes
+    codes, n = f.codes(), len(f.ms)
+    sources, targets = [], []
+    if is_boolean(f):
+        moving = f.table.astype(np.int64) ^ codes
+        for j in range(n):
+            b = bit(j, n)
+            sources.append(np.flatnonzero(moving & b))
+            targets.append(sources[-1] ^ b)
+        return np.concatenate(sources), np.concatenate(targets)
+    w = weights(f.ms)
+    for j in range(n):
+        d = np.sign(level(f.table, j, f.ms) - level(codes, j, f.ms))
+        moving = d != 0
+        sources.append(codes[moving])
+        targets.append(codes[moving] + d[moving]*w[j])
+    return np.concatenate(sources), np.concatenate(targets)
+
+
+def local_signs(f, j, s1):
+    # for the states x with x + s1*e_j in the state space, return their codes and
+    # the signs of s1*(f(x + s1*e_j) - f(x)), one column per component
+    xj = level(f.codes(), j, f.ms)
+    codes = np.flatnonzero((xj+s1 >= 0) & (xj+s1 <= f.ms[j]))
+    fy, fx = f.table[codes + s1*weights(f.ms)[j]], f.table[codes]
+    signs = np.empty((len(codes), len(f.ms)), dtype=np.int8)
+    for i in range(len(f.ms)):
+        signs[:, i] = s1*np.sign(level(fy, i, f.ms) - level(fx, i, f.ms))
+    return codes, signs
+
+
+# compact local interaction graph: uint8 array signs of shape (states, n, n),
+# signs[c, j, i] has bit 2*d+e set if there is an edge from j+1 to i+1 at the
+# state of code c, of sign 2*e-1, obtained from the neighbour in direction 2*d-1
+
+def local_int_graph_signs(f, I=None):
+    n = len(f.ms)
+    signs = np.zeros((len(f), n, n), dtype=np.uint8)
+    for j in (I if I else range(n)):
+        for d, s1 in enumerate([-1, 1]):
+            codes, s = local_signs(f, j, s1)
+            signs[codes, j, :] |= np.where(s > 0, 1 << (2*d+1), np.where(s < 0, 1 << 2*d, 0)).astype(np.uint8)
+    return signs
+
+
+def int_graph_edges(signs, ms, direction=False):
+    # convert a compact local interaction graph to a dict state -> list of edges
+    edges = [[] for c in range(len(signs))]
+    cs, js, is_ = np.nonzero(signs)
+    for c, j, i, b in zip(cs.tolist(), js.tolist(), is_.tolist(), signs[cs, js, is_].tolist()):
+        if direction:
+            edges[c].extend((j+1, i+1, 2*(k >> 1)-1, 2*(k & 1)-1) for k in range(4) if b >> k & 1)
+        else:
+            edges[c].extend((j+1, i+1, s) for s, mask in [(-1, 5), (1, 10)] if b & mask)
+    states = map(tuple, decode(np.arange(len(signs)), ms).tolist())
+    return dict(zip(states, edges))
+
+
+def local_int_graph_array(f, I=None, direction=False):
+    return int_graph_edges(local_int_graph_signs(f, I), f.ms, direction)
+
+
+def global_int_graph_array(f, I=None, direction=False):
+    # skips the neighbours in a direction once all the edges they can give are found
+    n = len(f.ms)
+    edges = set()
+    for j in (I if I else range(n)):
+        for s1 in [-1, 1]:
+            if not direction and all((j+1, i+1, s) in edges for i in range(n) for s in [-1, 1]):
+                continue
+            codes, signs = local_signs(f, j, s1)
+            for i in range(n):
+                for s in np.unique(signs[:, i]).tolist():
+                    if s!=0:
+                        edges.add((j+1, i+1, s1, s) if direction else (j+1, i+1, s))
+    return sorted(edges)
@@ -1,6 +1,10 @@
 from functools import reduce
 from itertools import product
-from networkx import attracting_components, DiGraph, simple_cycles
+from networkx import DiGraph
+import numpy as np
+
+from .implicit_din import ImplicitNetwork
+from .array_din import ArrayNetwork, decode, state_code, to_stepwise_array, to_asymptotic_array, fixed_point_codes, successor_codes
 
 ### some basic functions
 
@@ -23,11 +27,15 @@ def is_admissible(x, ms):
 
 def nc(f):
     # number of components
+    if isinstance(f, (ArrayNetwork, ImplicitNetwork)):
+        return len(f.ms)
     return len(list(f.keys())[0])
 
 
 def max_levels(f):
     # max expression level for each component
+    if isinstance(f, (ArrayNetwork, ImplicitNetwork)):
+        return list(f.ms)
     n = len(list(f.keys())[0])
     return [max([v[i] for v in f.keys()]) for i in range(n)]
 
@@ -47,9 +55,8 @@ def diff_inds(x, y):
 
 def cube(x, I):
     # x[I] = {y | yi=xi if i not in I(x,y)}
-    for y in boolean_states(len(x)):
-        if all([y[i]==x[i] for i in range(len(x)) if i not in I]):
-            yield y
+    for y in product(*[(0, 1) if i in I else (x[i],) for i in range(len(x))]):
+        yield y
 
 
 def picube(y, x, I):
@@ -66,6 +73,8 @@ def cubef(f, x, I):
 ### stepwise, asymptotic, constant, expansive
 
 def to_stepwise(f):
+    if isinstance(f, ArrayNetwork):
+        return to_stepwise_array(f)
     n = nc(f)
     return dict((x, tuple(x[i] + sign(f[x][i]-x[i]) for i in range(n))) for x in f)
 
@@ -80,6 +89,8 @@ def asymptotic_step(x, fx, m):
 
 
 def to_asymptotic(f):
+    if isinstance(f, ArrayNetwork):
+        return to_asymptotic_array(f)
     n = nc(f)
     ms = max_levels(f)
     return dict((x, tuple([asymptotic_step(x[i], f[x][i], ms[i]) for i in range(n)])) for x in f)
@@ -171,6 +182,8 @@ def is_fixed(f, x, I=None):
 
 
 def fixed_points(f):
+    if isinstance(f, ArrayNetwork):
+        return [tuple(x) for x in decode(fixed_point_codes(f), f.ms).tolist()]
     return [x for x in f if x==f[x]]
 
 
@@ -181,9 +194,146 @@ def has_fixed_points(f):
     return False
 
 
-def attractors(f, synch=False):
-    dG = sd_graph(f) if synch else ad_graph(f)
-    return attracting_components(dG)
+def ad_successors(f, x):
+    # successors of x in the asynchronous dynamics
+    if x not in f:
+        return []
+    fx = f[x]
+    return [shift(x, sign(fx[j]-x[j]), j) for j in range(len(x)) if x[j]!=fx[j]]
+
+
+def terminal_components(roots, successors):
+    # terminal strongly connected components reachable from roots in the graph
+    # defined by the function successors (iterative version of Tarjan's algorithm)
+    index, low = {}, {}
+    stack, on_stack, exits = [], set(), set()
+    for root in roots:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(successors(root)))]
+        while work:
+            v, succs = work[-1]
+            for w in succs:
+                if w not in index:
+                    index[w] = low[w] = len(index)
+                    stack.append(w)
+                    on_stack.add(w)
+                    work.append((w, iter(successors(w))))
+                    break
+                if w in on_stack:
+                    low[v] = min(low[v], index[w])
+                else:
+                    exits.add(v)
+            else:
+                work.pop()
+                if low[v]==index[v]:
+                    component, terminal = [], True
+                    while True:
+                        w = stack.pop()
+                        on_stack.discard(w)
+                        component.append(w)
+                        terminal = terminal and w not in exits
+                        if w==v: break
+                    if terminal:
+                        yield component
+                if work:
+                    u = work[-1][0]
+                    if v in on_stack:
+                        low[u] = min(low[u], low[v])
+                    else:
+                        exits.add(u)
+
+
+def functional_graph(succ):
+    # cycles, cycle reached, and distance to the cycle for each node
+    # of the graph {i -> succ[i]}, computed by following paths until
+    # a node already visited is met (each node is visited once)
+    N = len(succ)
+    attr, dist, pos = [-1]*N, [-1]*N, [-1]*N
+    cycles = []
+    for s in range(N):
+        if attr[s]>=0: continue
+        path, x = [], s
+        while attr[x]<0 and pos[x]<0:
+            pos[x] = len(path)
+            path.append(x)
+            x = succ[x]
+        if attr[x]<0:
+            # x is on the current path: new cycle
+            cycle, path = path[pos[x]:], path[:pos[x]]
+            for y in cycle:
+                attr[y], dist[y] = len(cycles), 0
+            cycles.append(cycle)
+        for y in reversed(path):
+            attr[y], dist[y] = attr[x], dist[x]+1
+            x = y
+    return cycles, attr, dist
+
+
+def sd_basins(f):
+    # synchronous dynamics: attractors (as cycles ordered along the dynamics),
+    # index of the attractor reached from each state, length of the transient
+    # before reaching it, and size of the basin of each attractor.
+    # For array networks, states are codes and the result consists of arrays.
+    if isinstance(f, ArrayNetwork):
+        cycles, attr, dist = functional_graph(f.table.tolist())
+        attr = np.array(attr)
+        return [np.array(c) for c in cycles], attr, np.array(dist), np.bincount(attr, minlength=len(cycles))
+    states = list(f)
+    states += [y for y in set(f.values()) if y not in f]
+    inds = dict((x, k) for k, x in enumerate(states))
+    cycles, attr, dist = functional_graph([inds[f[x]] if x in f else inds[x] for x in states])
+    basins = [0]*len(cycles)
+    for a in attr:
+        basins[a] += 1
+    return ([[states[k] for k in c] for c in cycles], dict(zip(states, attr)),
+            dict(zip(states, dist)), basins)
+
+
+def attractor_states(f, attrs, codes=False):
+    # attractors sorted by their smallest state,
+    # as sets of states or, if codes=True, as arrays of state codes
+    ms = max_levels(f) if codes and not isinstance(f, ArrayNetwork) else None
+    for a in sorted(sorted(a) for a in attrs):
+        if isinstance(f, ArrayNetwork):
+            yield np.array(a) if codes else set(map(tuple, decode(a, f.ms).tolist()))
+        else:
+            yield np.array([state_code(x, ms) for x in a]) if codes else set(a)
+
+
+def attractors(f, synch=False, codes=False):
+    if synch:
+        attrs = sd_basins(f)[0]
+    elif isinstance(f, ArrayNetwork):
+        attrs = terminal_components(range(len(f)), successor_codes(f, scan=True))
+    else:
+        attrs = terminal_components(f, lambda x: ad_successors(f, x))
+    return attractor_states(f, attrs, codes)
+
+
+def reachable_attractors(f, states, synch=False, codes=False, stats=False):
+    # attractors reachable from the given states, exploring only the
+    # states reachable from them. If stats=True, also return the number of
+    # reachable states and transitions
+    if isinstance(f, ArrayNetwork):
+        roots, succ = [state_code(x, f.ms) for x in states], successor_codes(f, synch)
+    elif synch:
+        roots, succ = list(states), lambda x: [f[x]] if x in f else []
+    else:
+        roots, succ = list(states), lambda x: ad_successors(f, x)
+    count = {"states": 0, "transitions": 0}
+    def successors(x):
+        ys = succ(x)
+        count["states"] += 1
+        count["transitions"] += len(ys)
+        return ys
+    attrs = list(attractor_states(f, terminal_components(roots, successors), codes))
+    if stats:
+        return attrs, count
+    return attrs
 
 
 def cyclic_attractors(f, synch=False):
@@ -193,12 +343,38 @@ def cyclic_attractors(f, synch=False):
             yield a
 
 
-def attractive_cycles(f, synch=False):
-    adG = ad_graph(f)
-    attrs = [sorted(list(a)) for a in attractors(f, synch=synch)]
-    cycles = simple_cycles(adG)
-    for c in cycles:
-        if sorted(c) in attrs:
+def spanning_cycles(states, successors):
+    # cycles through all the given states, starting from the smallest,
+    # in the graph defined by the function successors
+    states = set(states)
+    start = min(states)
+    path, on_path = [start], set([start])
+    work = [iter(successors(start))]
+    while work:
+        for y in work[-1]:
+            if y==start and len(path)==len(states):
+                yield list(path)
+            elif y in states and y not in on_path:
+                path.append(y)
+                on_path.add(y)
+                work.append(iter(successors(y)))
+                break
+        else:
+            work.pop()
+            on_path.discard(path.pop())
+
+
+def attractive_cycles(f, synch=False, max_length=None, max_cycles=None):
+    # cycles of the asynchronous dynamics visiting all the states of an attractor,
+    # searched only in the attractor, skipping attractors larger than max_length
+    k = 0
+    for a in cyclic_attractors(f, synch=synch):
+        if max_length and len(a)>max_length:
+            continue
+        for c in spanning_cycles(a, lambda x: ad_successors(f, x)):
+            if max_cycles and k>=max_cycles:
+                return
+            k = k+1
             yield c
 
 
@@ -1,5 +1,17 @@
+from io import StringIO
 from itertools import combinations, permutations
-from pysmt.shortcuts import And, EqualsOrIff, Iff, Not, Or, Symbol, Solver, Implies, Bool
+from multiprocessing import Process, Queue
+from queue import Empty
+from time import time
+from pysmt.shortcuts import And, Iff, Not, Or, Symbol, Solver, Implies, Bool, get_env
+from pysmt.rewritings import CNFizer
+from pysmt.logics import QF_BOOL
+from pysmt.smtlib.parser import SmtLibParser
+from pysmt.smtlib.script import smtlibscript_from_formula
+try:
+    from pyganak import Counter as GanakCounter
+except ImportError:
+    GanakCounter = None
 
 from .din import boolean_states, nc, diff_inds, neigh
 from .multi_to_boolean import multi_level_to_bool, admissible_states, admissible_sum_vect
@@ -57,7 +69,15 @@ def x1(x, j):
     return tuple(x[i] if i!=j else 1 for i in range(len(x)))
 
 def label(f, x, i, j):
-    return (f[x0(x, j)][i], f[x1(x, j)][i])
+    # with a boolean_map, the labels are cached and shared by x0(x, j) and x1(x, j)
+    cache = getattr(f, "cache", None)
+    if cache is None:
+        return (f[x0(x, j)][i], f[x1(x, j)][i])
+    key = ("label", x, i, j)
+    if key not in cache:
+        y0, y1 = x0(x, j), x1(x, j)
+        cache[("label", y0, i, j)] = cache[("label", y1, i, j)] = (f[y0][i], f[y1][i])
+    return cache[key]
 
 def is_neg(l):
     return And(l[0], Not(l[1]))
@@ -70,15 +90,24 @@ def is_pos(l):
 
 def edge(f, x, j, i, s):
     # edge at x from j to i of sign s
-    i, j = i-1, j-1
     if not s in [-1,0,+1]:
         raise ValueError("Invalid sign. Sign must be -1,0 or 1.")
+    cache = getattr(f, "cache", None)
+    if cache is None:
+        return signed_edge(label(f, x, i-1, j-1), s)
+    key = ("edge", x, j, i, s)
+    if key not in cache:
+        y0, y1 = x0(x, j-1), x1(x, j-1)
+        cache[("edge", y0, j, i, s)] = cache[("edge", y1, j, i, s)] = signed_edge(label(f, x, i-1, j-1), s)
+    return cache[key]
+
+def signed_edge(l, s):
     if s==-1:
-        return is_neg(label(f, x, i, j))
+        return is_neg(l)
     if s==0:
-        return is_zero(label(f, x, i, j))
+        return is_zero(l)
     if s==+1:
-        return is_pos(label(f, x, i, j))
+        return is_pos(l)
 
 # local
 def local_edges(f, edges, only=True):
@@ -109,15 +138,33 @@ def global_edges(f, edges, only=True, all_states=True):
 
 # circuits
 
-def circuits(n):
-    # circuits in a complete graph with n nodes
-    return [[c[0]] + list(p) for h in range(1, n+1)
-                             for c in combinations(range(1, n+1), h)
-                             for p in permutations(c[1:])]
-
-def is_circuit(f, x, c, sign=None):
+def iter_circuits(n, max_length=None):
+    # circuits in a complete graph with n nodes, generated by increasing length
+    for h in range(1, (n if max_length is None else min(n, max_length))+1):
+        for c in combinations(range(1, n+1), h):
+            for p in permutations(c[1:]):
+                yield [c[0]] + list(p)
+
+def circuits(n, max_length=None):
+    return list(iter_circuits(n, max_length))
+
+def parity_sign(negs, poss, sign):
+    # a negative label can be chosen for the edges in negs, a positive one for the edges
+    # in poss, and the number of negative labels chosen is odd (sign=-1) or even (sign=+1).
+    # Computed along the circuit, keeping whether an even or odd number of negative labels
+    # is possible so far: the formula (a DAG) is linear in the length of the circuit.
+    even, odd = Bool(True), Bool(False)
+    for neg, pos in zip(negs, poss):
+        even, odd = Or(And(even, pos), And(odd, neg)), Or(And(odd, pos), And(even, neg))
+    return odd if sign==-1 else even
+
+def is_circuit(f, x, c, sign=None, encoding="dnf"):
+    # encoding="parity" gives a formula linear in the length of the circuit
     edges = list(zip(c, c[1:]+[c[0]]))
     k = len(c)+1
+    if sign in [-1, +1] and encoding=="parity":
+        return parity_sign([edge(f, x, j, i, -1) for j,i in edges],
+                           [edge(f, x, j, i, +1) for j,i in edges], sign)
     if sign==-1:
         # an odd number of edges are negative
         return Or([And([edge(f, x, j, i, -1) for j,i in ls] +
@@ -131,9 +178,18 @@ def is_circuit(f, x, c, sign=None):
     # all edges exist
     return And([Not(edge(f, x, j, i, 0)) for j,i in edges])
 
-def is_global_circuit(f, c, sign=None):
+def no_local_circuits(f, sign=None, max_length=None, encoding="parity"):
+    # no local circuit of the given sign and length at most max_length,
+    # the candidate circuits being generated one at a time
+    n = nc(f)
+    return And(Not(is_circuit(f, x, c, sign, encoding)) for c in iter_circuits(n, max_length) for x in f)
+
+def is_global_circuit(f, c, sign=None, encoding="dnf"):
     edges = list(zip(c, c[1:]+[c[0]]))
     k = len(c)+1
+    if sign in [-1, +1] and encoding=="parity":
+        return parity_sign([Or(edge(f, x, j, i, -1) for x in f) for j,i in edges],
+                           [Or(edge(f, x, j, i, +1) for x in f) for j,i in edges], sign)
     if sign==-1:
         # an odd number of edges are negative
         return Or([And([Or(edge(f, x, j, i, -1) for x in f) for j,i in ls] +
@@ -156,12 +212,15 @@ def path_indices(path):
         inds.append(I[0]+1)
     return inds
 
-def is_path_circuit(f, path, c, sign=None):
+def is_path_circuit(f, path, c, sign=None, encoding="dnf"):
     edges = list(zip(c, c[1:]+[c[0]]))
     k = len(c)+1
     inds = path_indices(path)
     if any(i not in inds for i in c):
         return Bool(False)
+    if sign in [-1, +1] and encoding=="parity":
+        return parity_sign([edge(f, path[inds.index(j)], j, i, -1) for j,i in edges],
+                           [edge(f, path[inds.index(j)], j, i, +1) for j,i in edges], sign)
     if sign==-1:
         # an odd number of edges are negative
         return Or([And([edge(f, path[inds.index(j)], j, i, -1) for j,i in ls] +
@@ -179,11 +238,15 @@ def is_path_circuit(f, path, c, sign=None):
 
 def multilevel(f, ms):
     mltb = multi_level_to_bool(ms)
+    adm = {x: admissible_sum_vect(x, ms) for x in f}
+    # states with their own variables (all states for boolean_map,
+    # the admissible states for multilevel_map)
+    xs = [x for x in f if x==adm[x] or f[x] is not f[adm[x]]]
     # impose all states mapped to admissible
     a = [Implies(f[x][mltb[(i,j+1)]-1], f[x][mltb[(i,j)]-1])
-         for x in f for i in range(1,len(ms)+1) for j in range(1,ms[i-1])]
+         for x in xs for i in range(1,len(ms)+1) for j in range(1,ms[i-1])]
     # impose f(x) = f(adm(x))
-    b = [Iff(f[admissible_sum_vect(x, ms)][i], f[x][i]) for i in range(sum(ms)) for x in f]
+    b = [Iff(f[adm[x]][i], f[x][i]) for i in range(sum(ms)) for x in xs if x!=adm[x]]
     return And(a+b)
 
 def stepwise(f, ms):
@@ -202,8 +265,27 @@ def variables(n):
     return [[Symbol("x{}_{}".format(i+1,j+1)) for j in range(n)] for i in range(2**n)]
 
 
+class BooleanMap(dict):
+    # map state -> variables of its image, with a cache for the
+    # terms built by the constraints (labels and edges)
+
+    def __init__(self, *args, **kwargs):
+        dict.__init__(self, *args, **kwargs)
+        self.cache = {}
+
+
 def boolean_map(n):
-    return dict(zip(boolean_states(n), variables(n)))
+    return BooleanMap(zip(boolean_states(n), variables(n)))
+
+
+def multilevel_map(ms):
+    # Boolean map on sum(ms) components with variables only for the admissible states,
+    # each state sharing the variables of the admissible state with the same sum for
+    # each component, so that f(x) = f(adm(x)) holds without constraints.
+    # Use with solve(..., project=admissible_states(ms)) and boolean_to_multi
+    n = sum(ms)
+    vs = dict(zip(boolean_states(n), variables(n)))
+    return BooleanMap((x, vs[admissible_sum_vect(x, ms)]) for x in vs)
 
 
 def to_bn(model, n):
@@ -211,15 +293,259 @@ def to_bn(model, n):
     return {x: tuple(1 if model[v].is_true() else 0 for v in vsi) for x, vsi in zip(states, vs)}
 
 
-def solve(formula, n, max_models=None, solver="msat"):
-    s = Solver(name=solver)
-    st = s.is_sat(formula)
-    if st:
-        vs = [x for xs in variables(n) for x in xs]
-        k = 0
-        s.add_assertion(formula)
-        while s.solve() and ((not max_models) or k<max_models):
-            k = k+1
-            model = s.get_model()
-            s.add_assertion(Not(And([EqualsOrIff(v, model[v]) for v in vs])))
+def blocking_clause(model, vs):
+    # excludes the values of the variables vs in model
+    return Or([Not(v) if model[v].is_true() else v for v in vs])
+
+
+def solve(formula, n, max_models=None, solver="msat", project=None, **options):
+    # models are enumerated with one incremental solver, each one being blocked
+    # on the variables of the states in project (by default all the states).
+    # With project, the networks are restricted to these states (dict state -> image)
+    f = boolean_map(n)
+    states = list(f) if project is None else [tuple(x) for x in project]
+    vs = [v for x in states for v in f[x]]
+    s = Solver(name=solver, **options)
+    s.add_assertion(formula)
+    k = 0
+    while ((not max_models) or k<max_models) and s.solve():
+        k = k+1
+        model = s.get_model()
+        s.add_assertion(blocking_clause(model, vs))
+        if project is None:
             yield to_bn(model, n)
+        else:
+            yield {x: tuple(1 if model[v].is_true() else 0 for v in f[x]) for x in states}
+
+
+
+# solver portfolio
+
+def portfolio_worker(script, n, solver, seed, queue):
+    # runs in its own process: the formula is passed as an SMT-LIB script.
+    # Sends the backend, the network found, the time spent and whether it failed
+    start = time()
+    try:
+        formula = SmtLibParser().get_script(StringIO(script)).get_last_formula()
+        options = {} if seed is None else {"random_seed": seed}
+        sol = next(solve(formula, n, max_models=1, solver=solver, **options), None)
+        queue.put(((solver, seed), sol, time()-start, False))
+    except Exception:
+        queue.put(((solver, seed), None, time()-start, True))
+
+
+def solve_portfolio(formula, n, solvers=None, seeds=None, timeout=None):
+    # one network satisfying formula, found by running each solver with each seed
+    # (by default, only the solver's own seed) in its own process and keeping
+    # the first answer, the other processes being cancelled.
+    # Returns the network (None if the formula is unsatisfiable or no backend answered),
+    # the backend (solver, seed) that answered and the time in seconds
+    # spent by each backend (up to its cancellation)
+    if solvers is None:
+        solvers = sorted(get_env().factory.all_solvers(logic=QF_BOOL))
+    if seeds is None:
+        seeds = [None]
+    buf = StringIO()
+    smtlibscript_from_formula(formula).serialize(buf, daggify=True)
+    queue = Queue()
+    processes = {(s, seed): Process(target=portfolio_worker, args=(buf.getvalue(), n, s, seed, queue))
+                 for s in solvers for seed in seeds}
+    start = time()
+    for p in processes.values():
+        p.start()
+    sol, backend, timings = None, None, {}
+    try:
+        while len(timings)<len(processes):
+            b, res, t, failed = queue.get(timeout=None if timeout is None else max(0, start+timeout-time()))
+            timings[b] = t
+            if not failed:
+                sol, backend = res, b
+                break
+    except Empty:
+        pass
+    elapsed = time()-start
+    for p in processes.values():
+        p.terminate()
+        p.join()
+    for b in processes:
+        timings.setdefault(b, elapsed)
+    return sol, backend, timings
+
+
+# model counting
+
+def cnf_clauses(formula, index):
+    # clauses of an equisatisfiable CNF (Tseitin) as tuples of signed integers,
+    # index maps each variable to a positive integer and is extended with the new variables
+    def literal(l):
+        v = l.arg(0) if l.is_not() else l
+        if v not in index:
+            index[v] = len(index)+1
+        return -index[v] if l.is_not() else index[v]
+    return [tuple(literal(l) for l in c) for c in CNFizer().convert(formula)]
+
+
+
+def network_cnf(formula, n):
+    # clauses of an equisatisfiable CNF of formula, as tuples of signed integers.
+    # The variable k+1, for k < n*2^n, is f[x][i] for x = boolean_states(n)[k//n]
+    # and i = k%n, as in variables(n); the other variables follow.
+    # Returns the clauses and the number of variables
+    index = {v: k+1 for k, v in enumerate(v for vs in variables(n) for v in vs)}
+    formula = formula.simplify()
+    if formula.is_false():
+        return [()], len(index)
+    clauses = [] if formula.is_true() else cnf_clauses(formula, index)
+    return clauses, len(index)
+
+
+def variable_map(n):
+    # map DIMACS variable -> (state, component) of the network variables
+    return {k*n+i+1: (x, i) for k, x in enumerate(boolean_states(n)) for i in range(n)}
+
+
+def to_dimacs(formula, n):
+    # DIMACS CNF of formula, see network_cnf for the numbering of the variables
+    clauses, nvars = network_cnf(formula, n)
+    lines = ["p cnf {} {}".format(nvars, len(clauses))]
+    lines += [" ".join(map(str, c+(0,))) for c in clauses]
+    return "\n".join(lines)+"\n"
+
+
+def write_dimacs(formula, n, filename):
+    with open(filename, "w") as fn:
+        fn.write(to_dimacs(formula, n))
+
+
+def propagate(clauses, lits):
+    # simplify the clauses with the literals and unit propagation,
+    # return the remaining clauses and the assigned variables, or None on conflict
+    assigned = set()
+    lits = list(lits)
+    while lits:
+        l = lits.pop()
+        if -l in assigned:
+            return None
+        if l in assigned:
+            continue
+        assigned.add(l)
+        remaining = []
+        for c in clauses:
+            if l in c:
+                continue
+            if -l in c:
+                c = tuple(m for m in c if m!=-l)
+                if not c:
+                    return None
+                if len(c)==1:
+                    lits.append(c[0])
+            remaining.append(c)
+        clauses = remaining
+    return frozenset(clauses), {abs(l) for l in assigned}
+
+
+def components(clauses):
+    # split the clauses into sets with disjoint variables
+    parent = {}
+    def find(v):
+        while parent.setdefault(v, v)!=v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+    for c in clauses:
+        for l in c[1:]:
+            parent[find(abs(l))] = find(abs(c[0]))
+    parts = {}
+    for c in clauses:
+        parts.setdefault(find(abs(c[0])), []).append(c)
+    return [frozenset(p) for p in parts.values()]
+
+
+def clause_variables(clauses):
+    return {abs(l) for c in clauses for l in c}
+
+
+def is_sat_cnf(clauses):
+    if not clauses:
+        return True
+    l = next(iter(clauses))[0]
+    for lit in [l, -l]:
+        res = propagate(clauses, [lit])
+        if res and is_sat_cnf(res[0]):
+            return True
+    return False
+
+
+def count_cnf(clauses, project, cache=None):
+    # number of assignments of the variables in project appearing in the clauses
+    # that extend to a model: branch on the projected variables, split into
+    # independent components and cache the counts of components
+    cache = {} if cache is None else cache
+    clauses = frozenset(clauses)
+    if clauses in cache:
+        return cache[clauses]
+    parts = components(clauses)
+    if len(parts)>1:
+        res = 1
+        for p in parts:
+            res *= count_cnf(p, project, cache)
+            if res==0:
+                break
+    else:
+        vs = clause_variables(clauses)
+        occurrences = {}
+        for c in clauses:
+            for l in c:
+                if abs(l) in project:
+                    occurrences[abs(l)] = occurrences.get(abs(l), 0)+1
+        if not occurrences:
+            res = 1 if is_sat_cnf(clauses) else 0
+        else:
+            v = max(occurrences, key=occurrences.get)
+            res = 0
+            for lit in [v, -v]:
+                r = propagate(clauses, [lit])
+                if r:
+                    # projected variables removed without being assigned are free
+                    free = len(project & (vs - clause_variables(r[0]) - r[1]))
+                    res += count_cnf(r[0], project, cache) * 2**free
+    cache[clauses] = res
+    return res
+
+
+def projected_variables(n, project=None):
+    # variables of network_cnf for the states in project (by default all the states)
+    if project is None:
+        return list(range(1, n*2**n+1))
+    pos = dict((x, k) for k, x in enumerate(boolean_states(n)))
+    return [pos[tuple(x)]*n+i+1 for x in project for i in range(n)]
+
+
+def count_models(formula, n, project=None, counter=None):
+    # number of Boolean networks satisfying formula, without enumerating them.
+    # With project (a list of states), number of restrictions to these states
+    # of such networks. Other variables of the formula are existentially quantified.
+    # The CNF of network_cnf is counted with Ganak (counter="ganak", requires pyganak,
+    # used by default when installed) or with the bundled counter (counter="dpll"),
+    # which is only practical for easy formulas: it does not learn clauses and can
+    # take minutes on hard formulas with a few hundred variables (e.g. no local
+    # negative circuits of length 2 for n=4)
+    clauses, nvars = network_cnf(formula, n)
+    vs = projected_variables(n, project)
+    if () in clauses:
+        return 0
+    if counter is None:
+        counter = "ganak" if GanakCounter else "dpll"
+    if counter=="ganak" and vs:
+        c = GanakCounter()
+        c.new_vars(nvars)
+        c.add_clauses(clauses)
+        c.set_sampling_set(vs)
+        return c.count()
+    res = propagate(clauses, [c[0] for c in clauses if len(c)==1])
+    if res is None:
+        return 0
+    clauses, assigned = res
+    project = set(vs)
+    free = len(project - clause_variables(clauses) - assigned)
+    return count_cnf(clauses, project) * 2**free
@@ -0,0 +1,51 @@
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import product
+
+from .array_din import n_states
+
+# an implicit network is given by one function per component, mapping a state
+# (tuple) to the value of the component. Images are computed on demand and the
+# most recent ones are cached, so that local analyses (is_fixed, local_int_graph_state,
+# is_mirror_pair, reachable_attractors...) do not require all the states.
+
+class ImplicitNetwork(Mapping):
+    # read-only mapping state -> image,
+    # can be passed to all functions accepting a network as a dict
+
+    def __init__(self, functions, ms=None, cache_size=2**16):
+        self.functions = list(functions)
+        self.ms = [int(m) for m in ms] if ms else [1]*len(self.functions)
+        if len(self.ms)!=len(self.functions):
+            raise ValueError("One function per component is required.")
+        self.image = lru_cache(maxsize=cache_size)(self.compute_image)
+
+    def compute_image(self, x):
+        return tuple(int(fi(x)) for fi in self.functions)
+
+    def __getitem__(self, x):
+        if x not in self:
+            raise KeyError(x)
+        return self.image(x)
+
+    def __contains__(self, x):
+        return (isinstance(x, tuple) and len(x)==len(self.ms) and
+                all(0<=x[i]<=self.ms[i] for i in range(len(x))))
+
+    def __iter__(self):
+        return product(*[tuple(range(m+1)) for m in self.ms])
+
+    def __len__(self):
+        return n_states(self.ms)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "ImplicitNetwork({} components, levels {})".format(len(self.ms), self.ms)
+
+
+def implicit_network(f):
+    # implicit version of a network given as a dict
+    ks = list(f.keys())
+    ms = [max(x[i] for x in ks) for i in range(len(ks[0]))]
+    return ImplicitNetwork([lambda x, i=i: f[x][i] for i in range(len(ms))], ms)
@@ -1,9 +1,13 @@
-from functools import reduce
 from itertools import product
 from random import sample
-from sympy import Symbol, Add, Mul, Poly
+import gzip
+import re
+import numpy as np
+from sympy import Symbol, Add, Mul, lambdify
 
 from .din import boolean_states, discrete_states, nc
+from .array_din import ArrayNetwork, array_network, code_dtype, encode, n_states
+from .implicit_din import ImplicitNetwork
 
 # a discrete network is represented as a dict tuple(ints) -> tuple(ints)
 
@@ -23,7 +27,7 @@ def read_truth_table_file(filename, header=False):
     # convert files containing strings of the form "001 101" to a discrete network
     f = dict()
     with open(filename, 'r') as fn:
-        if header: fn.next()
+        if header: next(fn)
         for row in fn:
             x, fx = row.strip().split(' ')
             f[tuple([int(s) for s in x])] = tuple([int(s) for s in fx])
@@ -42,23 +46,289 @@ def save_truth_table(f, filename, header=None):
             fn.write(t + '\n')
 
 
+### Files of many networks
+# truth tables (as in tt) separated by empty lines,
+# compressed with gzip if the file name ends with .gz
+
+def open_tt(filename, mode):
+    if filename.endswith(".gz"):
+        return gzip.open(filename, mode+'t')
+    return open(filename, mode)
+
+
+def save_truth_tables(fs, filename, append=False, batch=1000):
+    # write the networks of the iterable fs, batch networks at a time,
+    # and return the number of networks written
+    k = 0
+    with open_tt(filename, 'a' if append else 'w') as fn:
+        rows = []
+        for f in fs:
+            rows.extend(tt(f))
+            rows.append('')
+            k += 1
+            if k % batch==0:
+                fn.write('\n'.join(rows) + '\n')
+                rows = []
+        if rows:
+            fn.write('\n'.join(rows) + '\n')
+    return k
+
+
+def read_truth_tables(filename):
+    # generator of the networks of the file, one at a time
+    with open_tt(filename, 'r') as fn:
+        rows = []
+        for row in fn:
+            if row.strip():
+                rows.append(row)
+            elif rows:
+                yield read_truth_table(rows)
+                rows = []
+        if rows:
+            yield read_truth_table(rows)
+
+
+### Binary truth tables
+# header: magic string, number of components and max_levels (little-endian uint32),
+# padded to a multiple of 8 bytes, then the table of image codes of an ArrayNetwork
+# (state-code order) as little-endian uint32, or int64 for more than 2^32 states
+
+MAGIC = b"DINPYTT1"
+
+
+def binary_header(ms):
+    header = MAGIC + np.array([len(ms)] + list(ms), dtype="<u4").tobytes()
+    return header + b"\0"*(-len(header) % 8)
+
+
+def table_dtype(ms):
+    return np.dtype("<u4") if code_dtype(ms)==np.uint32 else np.dtype("<i8")
+
+
+def save_binary_truth_table(f, filename):
+    af = array_network(f)
+    with open(filename, 'wb') as fn:
+        fn.write(binary_header(af.ms))
+        fn.write(af.table.astype(table_dtype(af.ms)).tobytes())
+
+
+def read_binary_truth_table(filename, mmap=True):
+    # ArrayNetwork whose table is mapped from the file (read only) without copy
+    with open(filename, 'rb') as fn:
+        if fn.read(len(MAGIC))!=MAGIC:
+            raise ValueError("{} is not a binary truth table.".format(filename))
+        n = int(np.frombuffer(fn.read(4), dtype="<u4")[0])
+        ms = np.frombuffer(fn.read(4*n), dtype="<u4").tolist()
+    offset, dtype = len(binary_header(ms)), table_dtype(ms)
+    if mmap:
+        table = np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(n_states(ms),))
+    else:
+        table = np.fromfile(filename, dtype=dtype, offset=offset)
+    return ArrayNetwork(ms, table)
+
+
+def tt_to_binary(tt_filename, filename, header=False):
+    # convert a text truth table (one digit per component) in bulk
+    with open(tt_filename, 'r') as fn:
+        if header: next(fn)
+        rows = [row.split() for row in fn if row.strip()]
+    n = len(rows[0][0])
+    xs = np.frombuffer("".join(r[0] for r in rows).encode(), dtype=np.uint8).reshape(len(rows), n) - ord("0")
+    fxs = np.frombuffer("".join(r[1] for r in rows).encode(), dtype=np.uint8).reshape(len(rows), n) - ord("0")
+    ms = xs.max(axis=0).tolist()
+    if len(rows)!=n_states(ms):
+        raise ValueError("Binary truth tables must be defined on all states.")
+    table = np.empty(len(rows), dtype=code_dtype(ms))
+    table[encode(xs, ms)] = encode(fxs, ms)
+    save_binary_truth_table(ArrayNetwork(ms, table), filename)
+
+
+def binary_to_tt(filename, tt_filename, header=None):
+    # write a text truth table in bulk, in the order of tt
+    af = read_binary_truth_table(filename)
+    n = len(af.ms)
+    chars = np.empty((len(af), 2*n+2), dtype=np.uint8)
+    chars[:, :n], chars[:, n+1:2*n+1] = af.states() + ord("0"), af.images() + ord("0")
+    chars[:, n], chars[:, 2*n+1] = ord(" "), ord("\n")
+    with open(tt_filename, 'w') as fn:
+        if header: fn.write(header + '\n')
+        fn.write(chars.tobytes().decode())
+
+
+### Boolean rules
+# one rule "name, expression" per line, as in the .bnet format:
+# operators ! (not), & (and), | (or), parentheses and constants 0, 1.
+# Components are numbered in the order of the rules.
+
+def tokens(expr):
+    res = []
+    for name, const, op in re.findall(r"\s*(?:([A-Za-z_][\w.]*)|(\d+)|(\S))", expr):
+        if op and op not in "!&|()":
+            raise ValueError("Invalid character {} in {}.".format(op, expr))
+        if const and const not in ["0", "1"]:
+            raise ValueError("Invalid constant {} in {}.".format(const, expr))
+        res.append(name or const or op)
+    return res
+
+
+def parse_rule(expr, names):
+    # parse an expression into nested tuples ("var", i), ("const", b),
+    # ("not", e), ("and", e1, e2), ("or", e1, e2)
+    ts, pos = tokens(expr), [0]
+    def peek():
+        return ts[pos[0]] if pos[0]<len(ts) else None
+    def take(t=None):
+        if peek() is None or (t and peek()!=t):
+            raise ValueError("Syntax error in {}.".format(expr))
+        pos[0] += 1
+        return ts[pos[0]-1]
+    def disjunction():
+        e = conjunction()
+        while peek()=="|":
+            take()
+            e = ("or", e, conjunction())
+        return e
+    def conjunction():
+        e = negation()
+        while peek()=="&":
+            take()
+            e = ("and", e, negation())
+        return e
+    def negation():
+        if peek()=="!":
+            take()
+            return ("not", negation())
+        if peek()=="(":
+            take()
+            e = disjunction()
+            take(")")
+            return e
+        t = take()
+        if t in ["0", "1"]:
+            return ("const", t=="1")
+        if t not in names:
+            raise ValueError("Unknown variable {} in {}.".format(t, expr))
+        return ("var", names.index(t))
+    e = disjunction()
+    if peek() is not None:
+        raise ValueError("Syntax error in {}.".format(expr))
+    return e
+
+
+def parse_rules(rows):
+    # names of the components and parsed rules
+    lines = [row.split("#")[0].strip() for row in rows]
+    lines = [l for l in lines if l and l.replace(" ", "")!="targets,factors"]
+    if any("," not in l for l in lines):
+        raise ValueError("Rules must be of the form name, expression.")
+    names = [l.split(",", 1)[0].strip() for l in lines]
+    if len(set(names))!=len(names):
+        raise ValueError("Repeated component in rules.")
+    return names, [parse_rule(l.split(",", 1)[1].strip(), names) for l in lines]
+
+
+def eval_rule(e, columns):
+    # value of a parsed rule on all the states given by the
+    # boolean arrays of their components (or on one state given by a tuple)
+    if e[0]=="var":
+        return columns[e[1]]
+    if e[0]=="const":
+        return np.full(len(columns[0]), e[1]) if isinstance(columns[0], np.ndarray) else e[1]
+    if e[0]=="not":
+        return ~eval_rule(e[1], columns) if isinstance(columns[0], np.ndarray) else not eval_rule(e[1], columns)
+    a, b = eval_rule(e[1], columns), eval_rule(e[2], columns)
+    return a & b if e[0]=="and" else a | b
+
+
+def read_rules(rows, implicit=False):
+    # Boolean network given by rules, as an ArrayNetwork computed in one pass
+    # over all states, or an ImplicitNetwork evaluating the rules on demand.
+    # Returns the network and the names of the components
+    names, rules = parse_rules(rows)
+    n = len(names)
+    if implicit:
+        return ImplicitNetwork([lambda x, e=e: eval_rule(e, [bool(v) for v in x]) for e in rules]), names
+    codes = np.arange(2**n, dtype=np.int64)
+    columns = [(codes >> (n-1-i)) & 1 == 1 for i in range(n)]
+    table = np.zeros(2**n, dtype=code_dtype([1]*n))
+    for i, e in enumerate(rules):
+        table |= eval_rule(e, columns).astype(table.dtype) << (n-1-i)
+    return ArrayNetwork([1]*n, table), names
+
+
+def read_rules_file(filename, implicit=False):
+    with open(filename, 'r') as fn:
+        return read_rules(fn, implicit)
+
+
 ### polynomials and expressions
 
+def moebius(values, n, mod2=True):
+    # coefficients of the multilinear polynomial with the given values on boolean_states(n),
+    # modulo 2 (algebraic normal form) or over the integers. The coefficient of the
+    # monomial with the variables {i+1 : x[i]=1} is at the position of x.
+    # The transform modulo 2 is an involution, and also evaluates a polynomial on all states.
+    a = np.array(values, dtype=np.int64)
+    for i in range(n):
+        b = a.reshape(2**i, 2, 2**(n-1-i))
+        if mod2:
+            b[:, 1, :] ^= b[:, 0, :]
+        else:
+            b[:, 1, :] -= b[:, 0, :]
+    return a
+
+
+def monomials(coeffs, n):
+    # dict monomial (tuple of variable indices, starting at 1) -> nonzero coefficient
+    return {tuple(i+1 for i in range(n) if c >> (n-1-i) & 1): int(coeffs[c]) for c in np.flatnonzero(coeffs).tolist()}
+
+
+def anf(f):
+    # algebraic normal form of each component of a Boolean network,
+    # as sorted lists of monomials (tuples of variable indices)
+    n = nc(f)
+    xs = list(boolean_states(n))
+    return [sorted(monomials(moebius([f[x][i] for x in xs], n), n), key=lambda m: (len(m), m)) for i in range(n)]
+
+
+def anf_expr(monos, vs):
+    # sympy expression of an algebraic normal form (sum modulo 2)
+    return Add(*[Mul(*[vs[i-1] for i in m]) for m in monos])
+
+
+def anf_to_sd(anfs, n):
+    # Boolean network given by the algebraic normal forms of its components
+    xs = list(boolean_states(n))
+    columns = []
+    for monos in anfs:
+        coeffs = np.zeros(2**n, dtype=np.int64)
+        for m in monos:
+            coeffs[sum(1 << (n-i) for i in m)] ^= 1
+        columns.append(moebius(coeffs, n))
+    return dict(zip(xs, map(tuple, np.stack(columns, axis=1).tolist())))
+
+
 def polys_to_sd(polys, vs):
+    # polynomials evaluated modulo 2 on all states at once
     n = len(vs)
-    states = boolean_states(n)
-    return dict((x, tuple(Poly(p,vs).subs({vs[i]:x[i] for i in range(n)})%2 for p in polys)) for x in states)
+    xs = list(boolean_states(n))
+    cols = np.array(xs, dtype=np.int64).T
+    values = [np.broadcast_to(np.asarray(lambdify(vs, p, "numpy")(*cols), dtype=np.int64) % 2, len(xs)) for p in polys]
+    return dict(zip(xs, map(tuple, np.stack(values, axis=1).tolist())))
 
 
-def poly(f, vs):
+def poly(f, vs, factor=False):
+    # multilinear polynomial with integer coefficients taking the values of f on the Boolean states
     n = len(vs)
-    return reduce(Add, [f[v]*reduce(Mul, [vs[i] if v[i] else 1-vs[i] for i in range(n)]) for v in f]).factor()
+    coeffs = moebius([f[x] for x in boolean_states(n)], n, mod2=False)
+    p = Add(*[c*Mul(*[vs[i-1] for i in m]) for m, c in monomials(coeffs, n).items()])
+    return p.factor() if factor else p
 
 
-def polys(f):
+def polys(f, factor=False):
     n = nc(f)
     vs = [Symbol("x"+str(i+1)) for i in range(n)]
-    return [poly(dict((v, f[v][i]) for v in f), vs) for i in range(n)], vs
+    return [poly(dict((v, f[v][i]) for v in f), vs, factor) for i in range(n)], vs
 
 
 ### Generate random discrete network
@@ -1,8 +1,7 @@
-from functools import reduce
-from itertools import chain, product
-from networkx import DiGraph, MultiDiGraph, simple_cycles
-from operator import mul
+from itertools import product
+from networkx import DiGraph
 
+from .array_din import ArrayNetwork, local_int_graph_array, global_int_graph_array
 from .din import nc, max_levels, sign, diff_inds
 
 ### Interaction graphs
@@ -46,6 +45,8 @@ def local_int_graph_attr_state(f, x, ms, I=None, direction=False):
 
 
 def local_int_graph(f, graph=local_int_graph_state, I=None, direction=False):
+    if isinstance(f, ArrayNetwork) and graph==local_int_graph_state:
+        return local_int_graph_array(f, I, direction)
     n = nc(f)
     ms = max_levels(f)
     edges = dict((x, graph(f, x, ms, I, direction)) for x in f)
@@ -74,54 +75,192 @@ def path_graph(f, path):
 
 # global interaction graph is a list of edges
 
+def max_edges(n, I=None, direction=False):
+    # number of possible edges in a global interaction graph
+    return (4 if direction else 2)*n*len(I if I else range(n))
+
+
 def global_int_graph(f, graph=local_int_graph_state, I=None, direction=False):
+    # union of the local interaction graphs,
+    # stops as soon as all the possible edges have been found
+    if isinstance(f, ArrayNetwork) and graph==local_int_graph_state:
+        return global_int_graph_array(f, I, direction)
     if graph==nu_int_graph:
-        lg = nu_int_graph(f)
+        return nu_global_int_graph(f)
+    n = nc(f)
+    ms = max_levels(f)
+    lgs = (graph(f, x, ms, I, direction) for x in f)
+    if graph==local_int_graph_state:
+        k = max_edges(n, I, direction)
+    elif graph==local_int_graph_attr_state:
+        k = max_edges(n, I)
     else:
-        lg = local_int_graph(f, graph=graph, I=I, direction=direction)
-    return sorted(list(set(e for x in lg for e in lg[x])))
+        k = None
+    edges = set()
+    for lg in lgs:
+        edges.update(lg)
+        if len(edges)==k:
+            break
+    return sorted(edges)
 
 
 # non-usual and other variants
+# the non-usual interaction graph at (x, y) depends only on x and on the
+# direction d = sign(y - x): an edge from j to i exists for d[j]!=0 if the term
+# (j, d[j], i, d[i]) computed at x is nonzero
 
-def nu_int_graph_states(f, x, y, ms):
+def nu_terms(f, x, ms):
+    # dict (j, dj, i, di) -> sign of the edge from j+1 to i+1 at x
+    # in direction dj for component j and di for component i
     n = len(x)
-    edges = []
-    for i in range(n):
-        for j in range(n):
-            if x[j]!=y[j]:
-                epsj = sign(y[j] - x[j])
+    terms = {}
+    for j in range(n):
+        for epsj in [-1, 1]:
+            if 0 <= x[j] + epsj <= ms[j]:
                 xepsj = tuple([x[k] if k!=j else x[j] + epsj for k in range(n)])
-                xiepsi = x[i] + float(sign(y[i] - x[i]))/2
-                s = epsj * sign(f[xepsj][i] - f[x][i])
-                mn, mx = min(f[xepsj][i], f[x][i]), max(f[xepsj][i], f[x][i])
-                if s != 0 and mn < xiepsi and xiepsi < mx:
-                    edges.append((j+1, i+1, s))
+                for i in range(n):
+                    s = epsj * sign(f[xepsj][i] - f[x][i])
+                    mn, mx = min(f[xepsj][i], f[x][i]), max(f[xepsj][i], f[x][i])
+                    for epsi in [-1, 0, 1]:
+                        if s != 0 and mn < x[i] + float(epsi)/2 and x[i] + float(epsi)/2 < mx:
+                            terms[(j, epsj, i, epsi)] = s
+    return terms
+
+
+def nu_edges(terms, d):
+    # edges of the non-usual interaction graph in direction d
+    n = len(d)
+    edges = [(j+1, i+1, terms[(j, d[j], i, d[i])]) for j in range(n) for i in range(n)
+             if d[j]!=0 and (j, d[j], i, d[i]) in terms]
     return sorted(list(set(edges)))
 
 
-def nu_int_graph(f):
+def nu_int_graph_states(f, x, y, ms):
+    d = tuple(sign(y[k] - x[k]) for k in range(len(x)))
+    return nu_edges(nu_terms(f, x, ms), d)
+
+
+def nu_int_graph_classes(f, x, ms):
+    # directions d = sign(y - x) of the states y != x, with the corresponding edges
+    terms = nu_terms(f, x, ms)
+    ds = product(*[[0] + ([1] if x[k] < ms[k] else []) + ([-1] if x[k] > 0 else []) for k in range(len(x))])
+    for d in ds:
+        if any(d):
+            yield d, nu_edges(terms, d)
+
+
+def nu_int_graph(f, sparse=False):
     # non-usual interaction graph based on the definition of non-usual Jacobian matrix in
     # Richard and Comet, Discrete Appl. Math. 155(2007) 2403-2413.
+    # If sparse, the graph is stored by direction, as dict (x, d) -> edges, for nonempty edges only
     n = nc(f)
     ms = max_levels(f)
-    return dict(((x, y), nu_int_graph_states(f, x, y, ms)) for x in f for y in f if x != y)
+    if sparse:
+        return dict(((x, d), edges) for x in f for d, edges in nu_int_graph_classes(f, x, ms) if edges)
+    graph = {}
+    for x in f:
+        terms, classes = nu_terms(f, x, ms), {}
+        for y in f:
+            if x != y:
+                d = tuple(sign(y[k] - x[k]) for k in range(n))
+                if d not in classes:
+                    classes[d] = nu_edges(terms, d)
+                graph[(x, y)] = list(classes[d])
+    return graph
+
+
+def nu_global_int_graph(f):
+    # union of the non-usual interaction graphs, computed from the terms at each state:
+    # a term (j, dj, i, di) is realised by some y if di = dj for i = j,
+    # and x[i] + di is a valid level for i != j
+    n = nc(f)
+    ms = max_levels(f)
+    edges = set()
+    for x in f:
+        for (j, dj, i, di), s in nu_terms(f, x, ms).items():
+            if (di == dj) if i == j else (0 <= x[i] + di <= ms[i]):
+                edges.add((j+1, i+1, s))
+        if len(edges)==max_edges(n):
+            break
+    return sorted(edges)
 
 
 ### Circuits
 
-def circuit_label_multi(G, circuit):
-    paths = [list(chain(*[k.values() for k in G.get_edge_data(i, j).values()]))
-             for i, j in zip(circuit, circuit[1:] + [circuit[0]])]
-    return list(set([reduce(mul, c, 1) for c in product(*paths)]))
 
+def reaching(preds, targets, nodes):
+    # nodes of the given set from which one of the targets can be reached within the set
+    res, frontier = set(targets), list(targets)
+    while frontier:
+        v = frontier.pop()
+        for u in preds[v]:
+            if u in nodes and u not in res:
+                res.add(u)
+                frontier.append(u)
+    return res
+
+
+def predecessors(succs):
+    preds = dict((v, set()) for v in succs)
+    for u in succs:
+        for v in succs[u]:
+            preds[v].add(u)
+    return preds
 
-def cycles_from_edges(edges):
-    G = MultiDiGraph()
+
+def signed_circuits(edges, sign=None):
+    # signed circuits of the graph with the given edges, generated lazily.
+    # The sign of a circuit is the product of the labels of its edges: a circuit
+    # using an edge with both labels has both signs, otherwise a single one.
+    # If sign is given, only the circuits with that sign are generated: the search
+    # keeps the signs of the current path, and does not extend it when they do not
+    # contain sign and no path back to the start uses a negative label.
+    # Sets of signs are bitmasks, bit 0 for +1 and bit 1 for -1.
+    masks = {}
     for e in edges:
-        G.add_edge(e[0], e[1], label=e[2])
-    cycles = simple_cycles(G)
-    return [(c, s) for c in cycles for s in circuit_label_multi(G, c)]
+        masks[(e[0], e[1])] = masks.get((e[0], e[1]), 0) | (1 if e[2]>0 else 2)
+    if sign==-1 and all(m == 1 for m in masks.values()):
+        return
+    want = 3 if not sign else (1 if sign>0 else 2)
+    # signs of a path extended by an edge
+    extend = dict(((m, l), (m if l & 1 else 0) | ((m >> 1 | m << 1) & 3 if l & 2 else 0))
+                  for m in range(4) for l in range(4))
+    succs = {}
+    for j, i in masks:
+        succs.setdefault(j, set()).add(i)
+        succs.setdefault(i, set())
+    preds = predecessors(succs)
+    for start in sorted(succs):
+        back = reaching(preds, [start], set(v for v in succs if v > start))
+        # nodes from which start can be reached through a negative label
+        neg = reaching(preds, [j for (j, i), l in masks.items() if l & 2 and j in back and i in back], back)
+        if sign==-1 and start not in neg:
+            continue
+        nexts = dict((v, [(w, masks[(v, w)]) for w in sorted(w for w in succs[v] if w in back and w != start) +
+                          ([start] if start in succs[v] else [])]) for v in back)
+        path, on_path, signs, work = [start], set([start]), [1], [iter(nexts[start])]
+        while work:
+            for w, l in work[-1]:
+                ss = extend[(signs[-1], l)]
+                if w == start:
+                    if ss & want & 2:
+                        yield list(path), -1
+                    if ss & want & 1:
+                        yield list(path), 1
+                elif w not in on_path and (ss & want or w in neg):
+                    path.append(w)
+                    on_path.add(w)
+                    signs.append(ss)
+                    work.append(iter(nexts[w]))
+                    break
+            else:
+                work.pop()
+                signs.pop()
+                on_path.discard(path.pop())
+
+
+def cycles_from_edges(edges, sign=None):
+    return list(signed_circuits(edges, sign))
 
 
 def local_circuits(f, graph=local_int_graph_state, I=None, direction=False, sign=None, at=None):
@@ -131,24 +270,51 @@ def local_circuits(f, graph=local_int_graph_state, I=None, direction=False, sign
     else:
         if at: Gf = local_int_graph_state(f, at, max_levels(f), I, direction)
         else: Gf = local_int_graph(f, graph, I, direction)
-    if sign:
-        return dict((x, [e for e in cycles_from_edges(Gf[x]) if e[-1]==sign]) for x in Gf)
     if at:
-        return cycles_from_edges(Gf)
-    return dict((x, cycles_from_edges(Gf[x])) for x in Gf)
+        return cycles_from_edges(Gf, sign)
+    # states with the same local graph share the circuits
+    cache = {}
+    for x in Gf:
+        edges = frozenset(Gf[x])
+        if edges not in cache:
+            cache[edges] = cycles_from_edges(Gf[x], sign)
+    return dict((x, list(cache[frozenset(Gf[x])])) for x in Gf)
 
 
 def global_circuits(f, graph=local_int_graph_state, I=None, direction=False, sign=None):
     Gf = global_int_graph(f, graph, I, direction)
-    circuits = cycles_from_edges(Gf)
-    if sign:
-        return sorted([e for e in circuits if e[-1]==sign])
-    return sorted(circuits)
+    return sorted(cycles_from_edges(Gf, sign))
 
 
 def path_circuits(f, path, sign=None):
     G = path_graph(f, path)
-    circuits = cycles_from_edges(G)
-    if sign:
-        return sorted([e for e in circuits if e[-1]==sign])
-    return sorted(circuits)
+    return sorted(cycles_from_edges(G, sign))
+
+
+### Existence of local circuits
+
+def find_local_circuit(f, sign, graph=local_int_graph_state, I=None, direction=False):
+    # first state (or pair of states for nu_int_graph) with a local circuit
+    # of the given sign, with the circuit; None if there is no such circuit.
+    # The search stops at the first circuit found.
+    ms = max_levels(f)
+    if graph==nu_int_graph:
+        # a representative y for each direction d = sign(y - x)
+        graphs = (((x, tuple(xi + di for xi, di in zip(x, d))), edges)
+                  for x in f for d, edges in nu_int_graph_classes(f, x, ms))
+    else:
+        graphs = ((x, graph(f, x, ms, I, direction)) for x in f)
+    checked = set()
+    for x, edges in graphs:
+        edges = frozenset(edges)
+        if edges in checked:
+            continue
+        c = next(signed_circuits(edges, sign), None)
+        if c:
+            return x, c
+        checked.add(edges)
+    return None
+
+
+def has_local_circuit(f, sign, graph=local_int_graph_state, I=None, direction=False):
+    return find_local_circuit(f, sign, graph, I, direction) is not None
@@ -0,0 +1,52 @@
+import numpy as np
+from pysat.solvers import Solver
+
+from .din import boolean_states
+from .find_din import network_cnf
+
+### enumerate Boolean networks satisfying a find_din formula with a SAT solver
+### from pysat, working on the CNF of the formula (see network_cnf)
+### instead of the pysmt objects
+
+def models_to_bns(models, n):
+    # decode a list of models (lists of signed integers) in one step
+    states = list(boolean_states(n))
+    values = (np.array([m[:n*2**n] for m in models]) > 0).astype(np.int8).reshape(len(models), 2**n, n)
+    return [dict(zip(states, map(tuple, v))) for v in values.tolist()]
+
+
+def solve_sat(formula, n, max_models=None, solver="cadical153", project=None, batch=1024):
+    # as solve, the models being blocked on the variables of the states in project
+    # and decoded by batches
+    N = n*2**n
+    clauses, nvars = network_cnf(formula, n)
+    if () in clauses:
+        return
+    states = list(boolean_states(n))
+    if project is None:
+        inds = np.arange(N)
+    else:
+        pos = {x: k for k, x in enumerate(states)}
+        inds = np.array([pos[tuple(x)]*n+i for x in project for i in range(n)], dtype=np.int64)
+    with Solver(name=solver, bootstrap_with=clauses) as s:
+        k, models = 0, []
+        while ((not max_models) or k<max_models) and s.solve():
+            k = k+1
+            model = s.get_model()
+            # variables unknown to the solver are set to 0
+            model = model + [-v for v in range(len(model)+1, N+1)]
+            s.add_clause([-model[v] for v in inds.tolist()])
+            models.append(model)
+            if len(models)==batch:
+                for bn in restrict(models_to_bns(models, n), project):
+                    yield bn
+                models = []
+        for bn in restrict(models_to_bns(models, n), project) if models else []:
+            yield bn
+
+
+def restrict(bns, project):
+    if project is None:
+        return bns
+    project = [tuple(x) for x in project]
+    return [{x: bn[x] for x in project} for bn in bns]
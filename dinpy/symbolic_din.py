@@ -0,0 +1,109 @@
+from functools import reduce
+from dd.autoref import BDD
+
+from .array_din import array_network, level
+
+### Symbolic (BDD) representation of Boolean networks
+
+# a symbolic network stores each component f_i as a BDD over the variables x1,...,xn,
+# and sets of states as BDDs over the same variables.
+# The asynchronous transition x -> y along component i exists if
+# f_i(x) != x_i and y is x with component i flipped.
+
+class SymbolicNetwork(object):
+
+    def __init__(self, rules, bdd=None):
+        # rules: one Boolean expression in x1,...,xn (e.g. "x1 & !x3") or BDD per component
+        self.n = len(rules)
+        self.bdd = bdd if bdd else BDD()
+        self.xs = ["x{}".format(i+1) for i in range(self.n)]
+        self.bdd.declare(*self.xs)
+        self.functions = [self.bdd.add_expr(r) if isinstance(r, str) else r for r in rules]
+        # moves[i]: states where component i can change
+        self.moves = [self.bdd.apply('xor', self.bdd.var(x), fi) for x, fi in zip(self.xs, self.functions)]
+
+
+def truth_table_bdd(bdd, xs, column):
+    # BDD of the Boolean function with values column,
+    # given in the order of boolean_states(len(xs))
+    if len(column)==1:
+        return bdd.true if column[0] else bdd.false
+    half = len(column)//2
+    lo, hi = truth_table_bdd(bdd, xs[1:], column[:half]), truth_table_bdd(bdd, xs[1:], column[half:])
+    return bdd.ite(bdd.var(xs[0]), hi, lo)
+
+
+def symbolic_network(f):
+    # symbolic version of a Boolean network defined on all states
+    af = array_network(f)
+    if any(m!=1 for m in af.ms):
+        raise ValueError("Symbolic networks must be Boolean.")
+    bdd, xs = BDD(), ["x{}".format(i+1) for i in range(len(af.ms))]
+    bdd.declare(*xs)
+    columns = [level(af.table, i, af.ms) for i in range(len(xs))]
+    return SymbolicNetwork([truth_table_bdd(bdd, xs, c) for c in columns], bdd)
+
+
+### sets of states
+
+def states_bdd(sf, states):
+    return reduce(lambda u, x: u | sf.bdd.cube(dict(zip(sf.xs, map(bool, x)))), states, sf.bdd.false)
+
+
+def bdd_states(sf, u):
+    # states in the set u, in no particular order
+    for d in sf.bdd.pick_iter(u, care_vars=sf.xs):
+        yield tuple(int(d[x]) for x in sf.xs)
+
+
+def count_states(sf, u):
+    return sf.bdd.count(u, nvars=sf.n)
+
+
+def flip(sf, u, i):
+    # states of u with component i flipped
+    return sf.bdd.let({sf.xs[i]: ~sf.bdd.var(sf.xs[i])}, u)
+
+
+### asynchronous dynamics
+
+def post_bdd(sf, u):
+    # successors of the states in u
+    return reduce(lambda v, i: v | flip(sf, u & sf.moves[i], i), range(sf.n), sf.bdd.false)
+
+
+def pre_bdd(sf, u):
+    # predecessors of the states in u
+    return reduce(lambda v, i: v | (sf.moves[i] & flip(sf, u, i)), range(sf.n), sf.bdd.false)
+
+
+def reachable_bdd(sf, u, backward=False):
+    # states reachable from (or, if backward, reaching) the states in u
+    image = pre_bdd if backward else post_bdd
+    reached, frontier = u, u
+    while frontier != sf.bdd.false:
+        frontier = image(sf, frontier) & ~reached
+        reached = reached | frontier
+    return reached
+
+
+def fixed_points_bdd(sf):
+    return reduce(lambda u, m: u & ~m, sf.moves, sf.bdd.true)
+
+
+def is_trap_domain_bdd(sf, u):
+    return post_bdd(sf, u) & ~u == sf.bdd.false
+
+
+def attractors_bdd(sf):
+    # attractors as BDDs: the states reachable from x form an attractor if
+    # they can all reach x. The states reaching x are either in that
+    # attractor or in no attractor, and are removed from the search.
+    remaining, candidates = sf.bdd.true, sf.bdd.true
+    while remaining != sf.bdd.false:
+        x = sf.bdd.cube(sf.bdd.pick(candidates if candidates != sf.bdd.false else remaining, care_vars=sf.xs))
+        forward, backward = reachable_bdd(sf, x), reachable_bdd(sf, x, backward=True)
+        if forward & ~backward == sf.bdd.false:
+            yield forward
+        remaining = remaining & ~backward
+        candidates = forward & remaining
@@ -7,42 +7,41 @@ from pysmt.shortcuts import And, Not
 
 from dinpy.din import attractors
 from dinpy.input_din import polys
-from dinpy.interaction_graphs import local_circuits
-from dinpy.find_din import boolean_map, solve, circuits, attractive_cycle, is_circuit
-from dinpy.find_din import multilevel, stepwise, fixed_point
-from dinpy.multi_to_boolean import boolean_to_multi
-
-
-def no_local_neg_circuits(f, n):
-    return [Not(is_circuit(f, x, c, sign=-1)) for x in f for c in circuits(n)]
+from dinpy.interaction_graphs import local_circuits, find_local_circuit
+from dinpy.find_din import boolean_map, solve, solve_portfolio, attractive_cycle, no_local_circuits
+from dinpy.find_din import multilevel, multilevel_map, stepwise, fixed_point
+from dinpy.multi_to_boolean import boolean_to_multi, admissible_states
 
 # find a Boolean network with an antipodal attractive cycle and no local negative circuits
 n = 6
 f = boolean_map(n)
-nolnc = no_local_neg_circuits(f, n)
+nolnc = no_local_circuits(f, -1)
 antip_cycle = [(1,)*k+(0,)*(n-k) for k in range(n)] + [(0,)*k+(1,)*(n-k) for k in range(n)] + [(0,)*n]
 attr_cycle = attractive_cycle(f, antip_cycle)
 print("Formula created.")
-sols = solve(And(nolnc+[attr_cycle]), n, max_models=1)
-try:
-    g = next(sols)
+# hard instance: run the available solvers with several seeds in parallel
+g, backend, timings = solve_portfolio(And(nolnc, attr_cycle), n, seeds=[None, 1, 2])
+print("Answer from {}, timings: {}".format(backend, timings))
+if g:
     pprint(g)
     pprint(polys(g))
     lc = local_circuits(g)
     print("Signs of local circuits: {}".format(set([s for x in lc for c, s in lc[x]])))
+    print("Local negative circuit: {}".format(find_local_circuit(g, -1)))
     print("Attractors: {}".format(list(attractors(g))))
-except StopIteration:
+else:
     print("No solutions.")
 
 # find a multilevel network with no local negative circuits
 ms = [3,3]
 n = sum(ms)
-f = boolean_map(n)
-formula = And(no_local_neg_circuits(f, n) +
+# variables only for the admissible states
+f = multilevel_map(ms)
+formula = And([no_local_circuits(f, -1)] +
               [multilevel(f, ms), stepwise(f, ms), Not(f[(1,0,0,0,0,0)][0])] +
               [Not(fixed_point(f, x)) for x in f])
 print("Formula created.")
-sols = solve(formula, n, max_models=1)
+sols = solve(formula, n, max_models=1, project=admissible_states(ms))
 try:
     sol = boolean_to_multi(next(sols), ms)
     pprint(sol)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""Tests for dinpy."""
+
+import unittest
+
+from dinpy.input_din import read_truth_table, random_map
+from dinpy.din import neigh, diff_inds, cube, sd_to_ad, boolean_states
+from dinpy.din import to_stepwise, to_asymptotic, is_stepwise, fixed_points, attractors, nc, max_levels, discrete_states
+from dinpy.interaction_graphs import local_int_graph, global_int_graph, local_circuits
+from dinpy.array_din import ArrayNetwork, array_network, to_dict, state_code, code_state, encode, decode
+from dinpy.array_din import local_int_graph_signs, int_graph_edges
+from dinpy.array_din import boolean_array_network, neigh_code, diff_inds_code, cube_codes, ad_successor_codes, ad_edges
+
+
+class TestArrayDin(unittest.TestCase):
+    def test_codes(self):
+        ms = [2,1,3]
+        states = list(discrete_states(ms))
+        self.assertEqual([state_code(x, ms) for x in states], list(range(len(states))))
+        self.assertEqual([code_state(c, ms) for c in range(len(states))], states)
+        self.assertEqual(decode(encode(states, ms), ms).tolist(), [list(x) for x in states])
+
+    def test_conversion(self):
+        ms = [2,1,3]
+        f = random_map(ms)
+        af = array_network(f)
+        self.assertEqual(af.ms, ms)
+        self.assertEqual(nc(af), 3)
+        self.assertEqual(max_levels(af), ms)
+        self.assertEqual(to_dict(af), f)
+        self.assertEqual(af, f)
+        self.assertEqual(dict(af), f)
+        self.assertTrue((3,0,0) not in af)
+        with self.assertRaises(KeyError):
+            af[(3,0,0)]
+        with self.assertRaises(ValueError):
+            array_network(read_truth_table(["00 11", "11 11"]))
+        with self.assertRaises(ValueError):
+            ArrayNetwork([1,1], [0,1,2])
+
+    def test_boolean_codes(self):
+        n, ms = 4, [1]*4
+        x, y = (0,1,1,0), (1,1,0,0)
+        c, d = state_code(x, ms), state_code(y, ms)
+        self.assertEqual(c, 6)
+        self.assertEqual(code_state(neigh_code(c, 0, n), ms), neigh(x, 0))
+        self.assertEqual(code_state(neigh_code(c, 3, n), ms), neigh(x, 3))
+        self.assertEqual(diff_inds_code(c, d, n), diff_inds(x, y))
+        self.assertEqual([code_state(e, ms) for e in cube_codes(c, [0,2], n)], list(cube(x, [0,2])))
+        self.assertEqual(list(cube_codes(c, [], n)), [c])
+        self.assertEqual(len(list(cube_codes(c, range(n), n))), 16)
+        f = random_map(ms)
+        af = array_network(f)
+        adf = sd_to_ad(f)
+        for x in boolean_states(n):
+            succs = ad_successor_codes(af, state_code(x, ms))
+            self.assertEqual(set(code_state(e, ms) for e in succs), adf[x])
+        sources, targets = ad_edges(af)
+        self.assertEqual(sorted(zip(sources.tolist(), targets.tolist())),
+                         sorted((state_code(x, ms), state_code(y, ms)) for x in adf for y in adf[x]))
+        self.assertEqual(boolean_array_network(2, [3,1,3,2]), read_truth_table(["00 11", "01 01", "10 11", "11 10"]))
+        ms = [2,1,3]
+        f = random_map(ms)
+        af = array_network(f)
+        adf = sd_to_ad(f)
+        for x in f:
+            self.assertEqual(set(code_state(e, ms) for e in ad_successor_codes(af, state_code(x, ms))), adf[x])
+
+    def test_stepwise_asymptotic(self):
+        f = read_truth_table(["00 12", "01 01", "02 00",
+                              "10 20", "11 12", "12 12",
+                              "20 02", "21 01", "22 11"])
+        af = array_network(f)
+        self.assertFalse(is_stepwise(af))
+        self.assertTrue(isinstance(to_stepwise(af), ArrayNetwork))
+        self.assertEqual(to_stepwise(af), to_stepwise(f))
+        self.assertEqual(to_asymptotic(af), to_asymptotic(f))
+        self.assertTrue(is_stepwise(to_stepwise(af)))
+
+    def test_attractors(self):
+        f = read_truth_table(["00 11", "01 01", "10 11", "11 10"])
+        af = array_network(f)
+        self.assertEqual(fixed_points(af), [(0,1)])
+        self.assertEqual(sorted(map(sorted, attractors(af))), [[(0,1)], [(1,0), (1,1)]])
+        ms = [2,3,1]
+        for f in [random_map(ms) for i in range(5)]:
+            af = array_network(f)
+            self.assertEqual(fixed_points(af), fixed_points(f))
+            for synch in [False, True]:
+                self.assertEqual(sorted(map(sorted, attractors(af, synch))),
+                                 sorted(map(sorted, attractors(f, synch))))
+
+    def test_int_graph(self):
+        ms = [2,3,1]
+        for f in [random_map(ms) for i in range(5)]:
+            af = array_network(f)
+            self.assertEqual(local_int_graph(af), local_int_graph(f))
+            self.assertEqual(local_int_graph(af, I=[1], direction=True), local_int_graph(f, I=[1], direction=True))
+            self.assertEqual(global_int_graph(af), global_int_graph(f))
+            self.assertEqual(global_int_graph(af, direction=True), global_int_graph(f, direction=True))
+            self.assertEqual(local_circuits(af), local_circuits(f))
+            signs = local_int_graph_signs(af)
+            self.assertEqual(int_graph_edges(signs, ms), local_int_graph(f))
+            self.assertEqual(int_graph_edges(signs, ms, direction=True), local_int_graph(f, direction=True))
+            self.assertEqual(int_graph_edges(local_int_graph_signs(af, I=[0,2]), ms), local_int_graph(f, I=[0,2]))
+
+    def test_int_graph_signs(self):
+        f = read_truth_table(["00 01", "01 00", "11 01", "10 00"])
+        signs = local_int_graph_signs(array_network(f))
+        self.assertEqual(signs.shape, (4,2,2))
+        self.assertEqual(signs.dtype.name, "uint8")
+        # at 00: 1 -> 2 negative (neighbour in direction +1), 2 -> 2 negative
+        self.assertEqual(signs[0].tolist(), [[0, 4], [0, 4]])
+        # at 11: 1 -> 2 positive, 2 -> 2 positive (neighbours in direction -1)
+        self.assertEqual(signs[3].tolist(), [[0, 2], [0, 2]])
+        self.assertEqual(int_graph_edges(signs, [1,1])[(1,1)], [(1,2,1), (2,2,1)])
+        self.assertEqual(int_graph_edges(signs, [1,1], direction=True)[(1,1)], [(1,2,-1,1), (2,2,-1,1)])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestArrayDin)
+    unittest.TextTestRunner(verbosity=2).run(suite)
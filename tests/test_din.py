@@ -2,15 +2,25 @@
 
 """Tests for dinpy."""
 
+import os
+import tempfile
 import unittest
 from itertools import combinations
 
 from dinpy.input_din import read_truth_table, read_truth_table_file, save_truth_table
 from dinpy.input_din import random_state, random_boolean_state, random_map, random_boolean_map
 from dinpy.input_din import polys, polys_to_sd, generate_maps, generate_boolean_maps
+from dinpy.input_din import moebius, anf, anf_expr, anf_to_sd
+from dinpy.input_din import read_rules, read_rules_file, parse_rule
+from dinpy.input_din import save_binary_truth_table, read_binary_truth_table, tt_to_binary, binary_to_tt
+from dinpy.input_din import save_truth_tables, read_truth_tables
 from dinpy.din import is_constant, is_stepwise, is_asymptotic, is_expansive, to_stepwise, to_asymptotic, boolean_states, is_admissible, discrete_states
 from dinpy.din import sd_to_ad, ad_to_sd, has_fixed_points, fixed_points, is_trap_domain, attractors, attractive_cycles, cyclic_attractors
 from dinpy.din import is_mirror_pair, is_mirror_pair_fixed, update, sequential, dist_set
+from dinpy.din import ad_graph, sd_graph, terminal_components, ad_successors, sd_basins, functional_graph, spanning_cycles
+from dinpy.din import reachable_attractors
+from dinpy.array_din import array_network
+from networkx import attracting_components, simple_cycles
 from dinpy.interaction_graphs import local_int_graph
 from dinpy.multi_to_boolean import to_boolean_vect, multi_to_boolean
 
@@ -23,6 +33,72 @@ class TestDin(unittest.TestCase):
         f = read_truth_table_file("data/test1.tt")
         self.assertTrue(is_constant(f))
 
+    def test_tt_header(self):
+        f = random_map([2,1,3])
+        with tempfile.TemporaryDirectory() as d:
+            save_truth_table(f, os.path.join(d, "f.tt"), header="levels 2 1 3")
+            self.assertEqual(read_truth_table_file(os.path.join(d, "f.tt"), header=True), f)
+
+    def test_binary_tt(self):
+        f = random_map([2,1,3])
+        with tempfile.TemporaryDirectory() as d:
+            fn, tt_fn = os.path.join(d, "f.dtt"), os.path.join(d, "f.tt")
+            save_binary_truth_table(f, fn)
+            g = read_binary_truth_table(fn)
+            self.assertEqual(g.ms, [2,1,3])
+            self.assertEqual(g, f)
+            self.assertEqual(list(attractors(g)), list(attractors(f)))
+            self.assertEqual(reachable_attractors(g, [(1,0,2)]), reachable_attractors(f, [(1,0,2)]))
+            self.assertEqual(reachable_attractors(g, [(1,0,2)], synch=True), reachable_attractors(f, [(1,0,2)], synch=True))
+            self.assertEqual(read_binary_truth_table(fn, mmap=False), g)
+            binary_to_tt(fn, tt_fn, header="header")
+            self.assertEqual(read_truth_table_file(tt_fn, header=True), f)
+            save_truth_table(f, tt_fn)
+            tt_to_binary(tt_fn, os.path.join(d, "g.dtt"))
+            with open(fn, "rb") as a, open(os.path.join(d, "g.dtt"), "rb") as b:
+                self.assertEqual(a.read(), b.read())
+            with self.assertRaises(ValueError):
+                read_binary_truth_table(tt_fn)
+        g, names = read_rules(["a, b", "b, !a & c", "c, a | !b"])
+        with tempfile.TemporaryDirectory() as d:
+            save_binary_truth_table(g, os.path.join(d, "g.dtt"))
+            self.assertEqual(read_binary_truth_table(os.path.join(d, "g.dtt")), g)
+            self.assertEqual(os.path.getsize(os.path.join(d, "g.dtt")), 8+16+4*8)
+
+    def test_truth_tables(self):
+        fs = list(generate_boolean_maps(2))
+        with tempfile.TemporaryDirectory() as d:
+            for name in ["fs.tt", "fs.tt.gz"]:
+                fn = os.path.join(d, name)
+                self.assertEqual(save_truth_tables(fs[:100], fn, batch=30), 100)
+                self.assertEqual(save_truth_tables(iter(fs[100:]), fn, append=True), 156)
+                gs = read_truth_tables(fn)
+                self.assertEqual(next(gs), fs[0])
+                self.assertEqual(list(gs), fs[1:])
+                self.assertEqual(sum(1 for f in read_truth_tables(fn) if has_fixed_points(f)),
+                                 sum(1 for f in fs if has_fixed_points(f)))
+            fn = os.path.join(d, "gs.tt")
+            gs = [random_map([2,1]), read_rules(["a, !b", "b, a"])[0], {(0,1): (1,1)}]
+            save_truth_tables(gs, fn)
+            self.assertEqual(list(read_truth_tables(fn)), [dict(g) for g in gs])
+            save_truth_tables([], fn)
+            self.assertEqual(list(read_truth_tables(fn)), [])
+
+    def test_read_rules(self):
+        f, names = read_rules(["targets, factors", "a, b & !c", "b, a | (c & 1)  # comment", "", "c, !(a|b)"])
+        self.assertEqual(names, ["a", "b", "c"])
+        self.assertEqual(f, read_truth_table(["000 001", "001 011", "010 100", "011 010",
+                                              "100 010", "101 010", "110 110", "111 010"]))
+        g, names = read_rules(["a, b & !c", "b, a | (c & 1)", "c, !(a|b)"], implicit=True)
+        self.assertEqual(dict(g), dict(f))
+        self.assertEqual(parse_rule("!a | b & 1", ["a", "b"]), ("or", ("not", ("var", 0)), ("and", ("var", 1), ("const", True))))
+        for rows in [["a, b &"], ["a, !c"], ["a, a $ 1"], ["a a"], ["a, 2"], ["a, (a"], ["a, a a"], ["a, 1", "a, 0"]]:
+            with self.assertRaises(ValueError):
+                read_rules(rows)
+        f, names = read_rules_file("data/test_rules.bnet")
+        self.assertEqual(names, ["u", "v", "w"])
+        self.assertEqual(fixed_points(f), [(0,0,1), (1,0,1), (1,1,0)])
+
     def test_save_tt_file(self):
         f = read_truth_table(["0 1", "1 2", "2 0"])
         f = save_truth_table(f, "data/test_save.tt")
@@ -34,6 +110,26 @@ class TestDin(unittest.TestCase):
         self.assertEqual((p[0]-x1*(1-x2)).simplify(), 0)
         self.assertEqual((p[1]-(1-x1)).simplify(), 0)
         self.assertEqual(polys_to_sd(p, xs), f)
+        p, xs = polys(f, factor=True)
+        self.assertEqual((p[0]-x1*(1-x2)).simplify(), 0)
+        for n in [1,3,4]:
+            g = random_boolean_map(n)
+            self.assertEqual(polys_to_sd(*polys(g)), g)
+
+    def test_anf(self):
+        f = read_truth_table(["00 01", "01 01", "10 10", "11 00"])
+        a = anf(f)
+        self.assertEqual(a, [[(1,), (1,2)], [(), (1,)]])
+        p, xs = polys(f)
+        x1, x2 = xs
+        self.assertEqual(anf_expr(a[0], xs), x1 + x1*x2)
+        self.assertEqual(polys_to_sd([anf_expr(m, xs) for m in a], xs), f)
+        self.assertEqual(anf_to_sd(a, 2), f)
+        self.assertEqual(moebius([0,1,1,0], 2).tolist(), [0,1,1,0])
+        self.assertEqual(moebius([0,1,1,0], 2, mod2=False).tolist(), [0,1,1,-2])
+        for n in [1,3,5]:
+            g = random_boolean_map(n)
+            self.assertEqual(anf_to_sd(anf(g), n), g)
 
     def test_random_state(self):
         ms = [4,5,2]
@@ -113,6 +209,63 @@ class TestDin(unittest.TestCase):
         self.assertEqual(list(cyclic_attractors(f)), [set([(1,0), (1,1)])])
         self.assertEqual(list(attractive_cycles(f)), [[(1,0), (1,1)]])
 
+    def test_attractor_engine(self):
+        f = read_truth_table(["00 11", "01 01", "10 11", "11 10"])
+        self.assertEqual(ad_successors(f, (0,0)), [(1,0), (0,1)])
+        self.assertEqual([a.tolist() for a in attractors(f, codes=True)], [[1], [2,3]])
+        self.assertEqual([a.tolist() for a in attractors(array_network(f), codes=True)], [[1], [2,3]])
+        self.assertEqual([sorted(c) for c in terminal_components([1], lambda k: [k % 5 + 1])], [[1,2,3,4,5]])
+        self.assertEqual(list(attractors({(0,0): (1,1), (1,0): (1,1)})), [set([(0,1)]), set([(1,1)])])
+        ms = [2,1,1,1]
+        for f in [random_map(ms) for i in range(10)]:
+            for synch in [False, True]:
+                dG = sd_graph(f) if synch else ad_graph(f)
+                attrs = sorted(sorted(a) for a in attracting_components(dG))
+                self.assertEqual([sorted(a) for a in attractors(f, synch=synch)], attrs)
+                self.assertEqual([sorted(a) for a in attractors(array_network(f), synch=synch)], attrs)
+
+    def test_reachable_attractors(self):
+        f = read_truth_table(["00 11", "01 01", "10 11", "11 10"])
+        self.assertEqual(reachable_attractors(f, [(0,1)]), [set([(0,1)])])
+        self.assertEqual(reachable_attractors(f, [(1,1)], stats=True), ([set([(1,0), (1,1)])], {"states": 2, "transitions": 2}))
+        self.assertEqual(reachable_attractors(f, [(0,0)]), list(attractors(f)))
+        self.assertEqual(reachable_attractors(f, [(0,0)], synch=True), [set([(1,0), (1,1)])])
+        self.assertEqual([a.tolist() for a in reachable_attractors(array_network(f), [(1,1), (0,1)], codes=True)], [[1], [2,3]])
+        ms = [2,1,1,1]
+        for f in [random_map(ms) for i in range(10)]:
+            for synch in [False, True]:
+                self.assertEqual(reachable_attractors(f, f, synch), list(attractors(f, synch)))
+                self.assertEqual(reachable_attractors(array_network(f), f, synch), list(attractors(f, synch)))
+
+    def test_attractive_cycles(self):
+        f = {x: tuple(1-xi for xi in x) for x in boolean_states(2)}
+        cs = [[(0,0), (0,1), (1,1), (1,0)], [(0,0), (1,0), (1,1), (0,1)]]
+        self.assertEqual(sorted(attractive_cycles(f)), cs)
+        self.assertEqual(len(list(attractive_cycles(f, max_cycles=1))), 1)
+        self.assertEqual(list(attractive_cycles(f, max_length=3)), [])
+        self.assertEqual(list(spanning_cycles([1,2,3], lambda k: [k % 3 + 1])), [[1,2,3]])
+        self.assertEqual(list(spanning_cycles([1,2,3], lambda k: [k % 4 + 1])), [])
+        ms = [1,1,1,1]
+        for f in [random_map(ms) for i in range(10)]:
+            attrs = [sorted(a) for a in attractors(f)]
+            cs = [c for c in simple_cycles(ad_graph(f)) if sorted(c) in attrs]
+            self.assertEqual(sorted(map(sorted, attractive_cycles(f))), sorted(map(sorted, cs)))
+
+    def test_sd_basins(self):
+        self.assertEqual(functional_graph([1,2,0,2,3,5]), ([[0,1,2], [5]], [0,0,0,0,0,1], [0,0,0,1,2,0]))
+        f = read_truth_table(["00 01", "01 10", "10 01", "11 11"])
+        cycles, attr, dist, basins = sd_basins(f)
+        self.assertEqual(cycles, [[(0,1), (1,0)], [(1,1)]])
+        self.assertEqual(attr, {(0,0): 0, (0,1): 0, (1,0): 0, (1,1): 1})
+        self.assertEqual(dist, {(0,0): 1, (0,1): 0, (1,0): 0, (1,1): 0})
+        self.assertEqual(basins, [3, 1])
+        cycles, attr, dist, basins = sd_basins(array_network(f))
+        self.assertEqual([c.tolist() for c in cycles], [[1,2], [3]])
+        self.assertEqual(attr.tolist(), [0,0,0,1])
+        self.assertEqual(dist.tolist(), [1,0,0,0])
+        self.assertEqual(basins.tolist(), [3,1])
+        self.assertEqual(sd_basins({(0,0): (1,1)})[0], [[(1,1)]])
+
     def test_mirror(self):
         ms = [3,2,4]
         f = random_map(ms)
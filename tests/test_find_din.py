@@ -3,13 +3,14 @@
 """Tests for dinpy."""
 
 import unittest
-from pysmt.shortcuts import And, Not
+from pysmt.shortcuts import And, Not, Iff, Or, Symbol
 
 from dinpy.din import is_trap_domain, attractive_cycles, is_stepwise
 from dinpy.interaction_graphs import local_int_graph_state, local_int_graph, global_int_graph, local_circuits, path_circuits, global_circuits, path_graph
-from dinpy.multi_to_boolean import boolean_to_multi, multi_level_to_bool
+from dinpy.multi_to_boolean import boolean_to_multi, multi_level_to_bool, admissible_states
 from dinpy.find_din import boolean_map, map_state, map_state_set, fixed_point, solve, succ, succ_set, orbit, trap_set, attractive_cycle
 from dinpy.find_din import edge, local_edges, global_edges, circuits, is_circuit, multilevel, stepwise, is_path_circuit, path_indices, is_global_circuit
+from dinpy.find_din import GanakCounter, count_models, solve_portfolio, label, multilevel_map, iter_circuits, no_local_circuits
 
 
 class TestFindDin(unittest.TestCase):
@@ -21,6 +22,55 @@ class TestFindDin(unittest.TestCase):
         self.assertEqual(len(list(solve(map_state_set(f, (0,), [(0,), (1,)]), 1))), 4)
         self.assertEqual(len(list(solve(map_state_set(f, (0,), [(0,), (1,)]), 1, max_models=3))), 3)
 
+    def test_solve(self):
+        n = 2
+        f = boolean_map(n)
+        formula = And(fixed_point(f, (0,0)), fixed_point(f, (0,1)), fixed_point(f, (1,0)))
+        sols = list(solve(formula, n))
+        self.assertEqual(len(sols), 4)
+        self.assertEqual(sorted(sol[(1,1)] for sol in sols), [(0,0), (0,1), (1,0), (1,1)])
+        self.assertEqual(len(list(solve(formula, n, max_models=2))), 2)
+        self.assertEqual(list(solve(formula, n, project=[(0,0)])), [{(0,0): (0,0)}])
+        sols = list(solve(fixed_point(f, (0,0)), n, project=[(0,1), (1,1)]))
+        self.assertEqual(len(sols), 16)
+        self.assertTrue(all(sorted(sol)==[(0,1), (1,1)] for sol in sols))
+        self.assertEqual(list(solve(And(fixed_point(f, (0,0)), Not(f[(0,0)][0])), n, project=[])), [{}])
+        self.assertEqual(list(solve(And(f[(0,0)][0], Not(f[(0,0)][0])), n)), [])
+
+    def test_count_models(self):
+        counters = ["dpll"] + (["ganak"] if GanakCounter else [])
+        n = 2
+        f = boolean_map(n)
+        formulas = [fixed_point(f, (0,0)),
+                    And([Not(is_circuit(f, x, [1,2], -1)) for x in f]),
+                    Or(f[(0,0)][0], Symbol("y")),
+                    And(f[(0,0)][0], Not(f[(0,0)][0]))]
+        for counter in counters:
+            for formula in formulas:
+                self.assertEqual(count_models(formula, n, counter=counter), len(list(solve(formula, n))))
+                for project in [[(0,1),(1,1)], []]:
+                    self.assertEqual(count_models(formula, n, project=project, counter=counter),
+                                     len(list(solve(formula, n, project=project))))
+        n = 3
+        f = boolean_map(n)
+        for counter in counters:
+            self.assertEqual(count_models(fixed_point(f, (0,0,0)), n, counter=counter), 2**21)
+            self.assertEqual(count_models(And([Not(is_circuit(f, x, [i], -1)) for x in f for i in range(1,n+1)]), n,
+                                          counter=counter), 3**12)
+            self.assertEqual(count_models(no_local_circuits(f, -1), n, counter=counter), 87077)
+
+    def test_solve_portfolio(self):
+        n = 3
+        f = boolean_map(n)
+        sol, backend, timings = solve_portfolio(And(fixed_point(f, (0,0,0)), Not(fixed_point(f, (1,1,1)))), n, seeds=[1,2])
+        self.assertEqual(sol[(0,0,0)], (0,0,0))
+        self.assertNotEqual(sol[(1,1,1)], (1,1,1))
+        self.assertTrue(backend in timings)
+        self.assertEqual(len(timings), 2*len(set(b[0] for b in timings)))
+        sol, backend, timings = solve_portfolio(And(f[(0,0,0)][0], Not(f[(0,0,0)][0])), n)
+        self.assertEqual(sol, None)
+        self.assertTrue(backend in timings)
+
     def test_succ(self):
         n = 3
         f = boolean_map(n)
@@ -88,6 +138,21 @@ class TestFindDin(unittest.TestCase):
         with self.assertRaises(ValueError):
             solve(edge(f, (0,1,1), 2, 3, 2), n)
 
+    def test_edge_cache(self):
+        n = 3
+        f = boolean_map(n)
+        g = dict(f)
+        self.assertEqual(f, g)
+        for x in f:
+            for j in range(1,n+1):
+                for i in range(1,n+1):
+                    self.assertEqual(label(f, x, i-1, j-1), label(g, x, i-1, j-1))
+                    for s in [-1,0,+1]:
+                        self.assertEqual(edge(f, x, j, i, s), edge(g, x, j, i, s))
+        self.assertTrue(edge(f, (0,1,0), 2, 3, -1) is edge(f, (0,0,0), 2, 3, -1))
+        self.assertEqual(len([k for k in f.cache if k[0]=="edge"]), 3*n*n*2**n)
+        self.assertEqual(global_edges(f, [(1,2,1)], all_states=False), global_edges(g, [(1,2,1)], all_states=False))
+
     def test_local_graph(self):
         n = 1
         f = boolean_map(n)
@@ -151,6 +216,20 @@ class TestFindDin(unittest.TestCase):
         self.assertEqual(circuits(1), [[1]])
         self.assertEqual(circuits(2), [[1],[2],[1,2]])
         self.assertEqual(circuits(3), [[1],[2],[3],[1,2],[1,3],[2,3],[1,2,3],[1,3,2]])
+        self.assertEqual(circuits(3, max_length=2), [[1],[2],[3],[1,2],[1,3],[2,3]])
+        self.assertEqual(list(iter_circuits(4)), circuits(4))
+        self.assertEqual(next(iter_circuits(20)), [1])
+        self.assertEqual(sum(1 for c in iter_circuits(8, max_length=3)), 8+28+112)
+
+    def test_no_local_circuits(self):
+        n = 3
+        f = boolean_map(n)
+        for sign in [-1, +1]:
+            formula = And([Not(is_circuit(f, x, c, sign)) for x in f for c in circuits(n, 2)])
+            self.assertEqual(count_models(no_local_circuits(f, sign, max_length=2), n), count_models(formula, n))
+        sol = next(solve(And(no_local_circuits(f, -1), Not(fixed_point(f, (0,0,0)))), n, max_models=1))
+        lcs = local_circuits(sol)
+        self.assertFalse(any(s==-1 for x in lcs for c, s in lcs[x]))
 
     def test_circuit_signs(self):
         n = 4
@@ -196,6 +275,24 @@ class TestFindDin(unittest.TestCase):
         for x in f:
             self.assertFalse(([1,4,3],+1) in lcs[x])
 
+    def test_parity_encoding(self):
+        n = 4
+        f = boolean_map(n)
+        path = [(0,0,0,0),(0,1,0,0),(0,1,1,0),(1,1,1,0),(1,1,1,1)]
+        for c in [[1], [2,3], [1,4,2], [1,2,3,4]]:
+            for sign in [-1, +1]:
+                for dnf, parity in [(is_circuit(f, (0,1,0,0), c, sign), is_circuit(f, (0,1,0,0), c, sign, encoding="parity")),
+                                    (is_global_circuit(f, c, sign), is_global_circuit(f, c, sign, encoding="parity")),
+                                    (is_path_circuit(f, path, c, sign), is_path_circuit(f, path, c, sign, encoding="parity"))]:
+                    self.assertEqual(list(solve(Not(Iff(dnf, parity)), n, max_models=1)), [])
+        formula = And([Not(is_circuit(f, x, [2,3,4], -1, encoding="parity")) for x in f] +
+                      [is_global_circuit(f, [2,3,4], sign=-1, encoding="parity")])
+        sol = next(solve(formula, n, max_models=1))
+        lcs = local_circuits(sol)
+        self.assertTrue(([2,3,4],-1) in global_circuits(sol))
+        for x in f:
+            self.assertFalse(([2,3,4],-1) in lcs[x])
+
     def test_multilevel(self):
         ms = [2,1,4]
         n = sum(ms)
@@ -212,6 +309,29 @@ class TestFindDin(unittest.TestCase):
         self.assertTrue(all(e in global_int_graph(sol) for e in rg))
         self.assertTrue(is_stepwise(sol))
 
+    def test_multilevel_map(self):
+        ms = [2,1,2]
+        n = sum(ms)
+        f = multilevel_map(ms)
+        adms = admissible_states(ms)
+        self.assertEqual(len(set(v for x in f for v in f[x])), len(adms)*n)
+        self.assertTrue(f[(0,1,0,1,0)] is f[(1,0,0,1,0)])
+        rg = [(1,1,1), (2,1,-1)]
+        rgl = [((1,1),(1,2),1), ((2,1),(1,1),-1)]
+        mltb = multi_level_to_bool(ms)
+        formula = And(multilevel(f, ms), stepwise(f, ms),
+                      global_edges(f, [(mltb[j],mltb[i],s) for j,i,s in rgl], all_states=False, only=False))
+        sols = list(solve(formula, n, max_models=5, project=adms))
+        self.assertEqual(len(sols), 5)
+        for sol in sols:
+            g = boolean_to_multi(sol, ms)
+            self.assertTrue(all(e in global_int_graph(g) for e in rg))
+            self.assertTrue(is_stepwise(g))
+        g = boolean_map(n)
+        formula_g = And(multilevel(g, ms), stepwise(g, ms),
+                        global_edges(g, [(mltb[j],mltb[i],s) for j,i,s in rgl], all_states=False, only=False))
+        self.assertEqual(count_models(formula, n, project=adms), count_models(formula_g, n, project=adms))
+
     def test_path_indices(self):
         self.assertEqual(path_indices([(1,0,1),(1,0,0),(1,1,0),(0,1,0)]), [3,2,1])
         with self.assertRaises(ValueError):
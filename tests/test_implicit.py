@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+
+"""Tests for dinpy."""
+
+import unittest
+
+from dinpy.input_din import random_map
+from dinpy.din import nc, max_levels, is_fixed, is_mirror_pair, reachable_attractors, attractors, fixed_points
+from dinpy.interaction_graphs import local_int_graph_state, local_int_graph, local_circuits
+from dinpy.implicit_din import ImplicitNetwork, implicit_network
+
+
+class TestImplicit(unittest.TestCase):
+    def test_implicit_network(self):
+        ms = [2,1,2]
+        f = random_map(ms)
+        g = implicit_network(f)
+        self.assertEqual(nc(g), 3)
+        self.assertEqual(max_levels(g), ms)
+        self.assertEqual(len(g), 18)
+        self.assertEqual(g, f)
+        self.assertEqual(fixed_points(g), fixed_points(f))
+        self.assertEqual(local_int_graph(g), local_int_graph(f))
+        self.assertEqual(list(attractors(g)), list(attractors(f)))
+        self.assertTrue((3,0,0) not in g)
+        with self.assertRaises(KeyError):
+            g[(3,0,0)]
+        with self.assertRaises(ValueError):
+            ImplicitNetwork([lambda x: 0], [1,1])
+
+    def test_large_network(self):
+        # oscillator on the first two components, the other components are 0
+        n = 30
+        f = ImplicitNetwork([lambda x: 1-x[1], lambda x: x[0]] + [lambda x: 0]*(n-2))
+        x = (0,)*n
+        self.assertEqual(nc(f), n)
+        self.assertEqual(max_levels(f), [1]*n)
+        self.assertTrue(is_fixed(f, x, range(2, n)))
+        self.assertFalse(is_fixed(f, x))
+        self.assertEqual(local_int_graph_state(f, x, f.ms), [(1,2,1), (2,1,-1)])
+        self.assertEqual(local_circuits(f, at=x), [([1,2], -1)])
+        self.assertTrue(is_mirror_pair(f, (1,1)+(0,)*(n-2), (0,0)+(0,)*(n-2), defn="cube"))
+        attrs, stats = reachable_attractors(f, [x], stats=True)
+        self.assertEqual(attrs, [set([(0,0)+(0,)*(n-2), (0,1)+(0,)*(n-2), (1,0)+(0,)*(n-2), (1,1)+(0,)*(n-2)])])
+        self.assertEqual(stats["states"], 4)
+        self.assertTrue(f.image.cache_info().hits > 0)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestImplicit)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -8,6 +8,9 @@ from dinpy.input_din import read_truth_table, random_map
 from dinpy.din import boolean_states, discrete_states, to_stepwise, diff_inds, sign, is_admissible, neigh
 from dinpy.interaction_graphs import global_int_graph, local_int_graph, global_circuits, local_circuits, nu_int_graph, local_int_graph_state, local_int_graph_attr_state
 from dinpy.multi_to_boolean import multi_to_boolean, multi_to_boolean_adm, multi_level_to_bool, to_boolean_vect, bool_vars_to_multi, to_multi
+from dinpy.interaction_graphs import max_edges, nu_int_graph_classes, nu_global_int_graph
+from dinpy.interaction_graphs import cycles_from_edges, signed_circuits, find_local_circuit, has_local_circuit
+from dinpy.implicit_din import ImplicitNetwork
 
 
 class TestIntGraph(unittest.TestCase):
@@ -26,6 +29,23 @@ class TestIntGraph(unittest.TestCase):
         self.assertEqual(grg1, grg2)
         self.assertEqual(grg1, gg)
 
+    def test_global_early_exit(self):
+        ms = [2,1,2]
+        for f in [random_map(ms) for i in range(5)]:
+            for graph in [local_int_graph_state, local_int_graph_attr_state]:
+                for I, direction in [(None, False), (None, True), ([0,2], False)]:
+                    lig = local_int_graph(f, graph=graph, I=I, direction=direction)
+                    self.assertEqual(global_int_graph(f, graph=graph, I=I, direction=direction),
+                                     sorted(set(e for x in lig for e in lig[x])))
+            nug = nu_int_graph(f)
+            self.assertEqual(global_int_graph(f, graph=nu_int_graph), sorted(set(e for p in nug for e in nug[p])))
+        self.assertEqual(max_edges(3), 18)
+        self.assertEqual(max_edges(3, I=[0], direction=True), 12)
+        # all components are the parity of the state: all edges appear in the first states
+        n = 20
+        f = ImplicitNetwork([lambda x: sum(x) % 2]*n)
+        self.assertEqual(len(global_int_graph(f)), max_edges(n))
+
     def test_circuits(self):
         f1 = read_truth_table(["00 00", "01 10", "10 01", "11 10"])
         lcs1 = {(0,0): [([1,2], +1)], (0,1): [], (1,0): [([1,2], +1), ([2], -1)], (1,1): [([2], -1)]}
@@ -54,6 +74,44 @@ class TestIntGraph(unittest.TestCase):
         self.assertEqual(gcs2n, global_circuits(f2, sign=-1))
         self.assertEqual(gcs2p, global_circuits(f2, sign=+1))
 
+    def test_circuit_enumeration(self):
+        edges = [(1,2,1), (2,1,-1), (2,1,1), (2,2,-1)]
+        self.assertEqual(cycles_from_edges(edges), [([1,2], -1), ([1,2], 1), ([2], -1)])
+        self.assertEqual(cycles_from_edges(edges, sign=-1), [([1,2], -1), ([2], -1)])
+        self.assertEqual(cycles_from_edges([(1,2,1), (2,1,1)], sign=-1), [])
+        f = read_truth_table(["00 00", "01 10", "10 01", "11 10"])
+        self.assertEqual(local_circuits(f, at=(1,0), sign=-1), [([2], -1)])
+        lcs = local_circuits(f)
+        lcs[(1,0)].append(None)
+        self.assertEqual(local_circuits(f)[(1,0)], [([1,2], +1), ([2], -1)])
+
+    def test_find_local_circuit(self):
+        f = read_truth_table(["00 00", "01 10", "10 01", "11 10"])
+        self.assertEqual(find_local_circuit(f, -1), ((1,0), ([2], -1)))
+        self.assertEqual(find_local_circuit(f, +1), ((0,0), ([1,2], +1)))
+        f = read_truth_table(["00 01", "01 11", "10 00", "11 10"])
+        self.assertFalse(has_local_circuit(f, +1))
+        self.assertTrue(has_local_circuit(f, -1))
+        self.assertEqual(next(signed_circuits([(1,2,1), (2,1,-1), (2,1,1)], sign=1)), ([1,2], 1))
+        n = 6
+        edges = [(j,i,1) for j in range(1,n+1) for i in range(1,n+1)] + [(5,4,-1)]
+        negs = list(signed_circuits(edges, sign=-1))
+        self.assertTrue(all(s==-1 and any((j,i)==(5,4) for j,i in zip(c, c[1:]+[c[0]])) for c, s in negs))
+        self.assertEqual(sorted(negs), sorted(c for c in signed_circuits(edges) if c[1]==-1))
+        ms = [1,2,1]
+        for f in [random_map(ms) for i in range(10)]:
+            for sign in [-1, 1]:
+                lcs = local_circuits(f, sign=sign)
+                w = find_local_circuit(f, sign)
+                self.assertEqual(w is not None, any(len(lcs[x])>0 for x in lcs))
+                if w:
+                    self.assertTrue(w[1] in lcs[w[0]])
+                lcs = local_circuits(f, graph=nu_int_graph, sign=sign)
+                w = find_local_circuit(f, sign, graph=nu_int_graph)
+                self.assertEqual(w is not None, any(len(lcs[p])>0 for p in lcs))
+                if w:
+                    self.assertTrue(w[1] in lcs[w[0]])
+
     def test_non_usual(self):
         f = read_truth_table(["00 21", "01 02", "02 20",
                               "10 20", "11 00", "12 02",
@@ -69,6 +127,15 @@ class TestIntGraph(unittest.TestCase):
         self.assertEqual(lcnu[(0,1), (1,0)], [([1,2], 1)])
         gcnu = global_circuits(f, graph=nu_int_graph)
         self.assertEqual(gcnu, [([1], -1), ([1,2], -1), ([1,2], +1), ([2], -1), ([2], +1)])
+        snug = nu_int_graph(f, sparse=True)
+        self.assertEqual(snug[(1,2), (-1,-1)], [(1,1,-1), (1,2,1), (2,2,1)])
+        self.assertEqual(snug[(1,2), (0,-1)], [(2,2,1)])
+        self.assertEqual(snug[(0,1), (1,-1)], [(1,2,-1), (2,1,-1)])
+        self.assertTrue(all(len(e)>0 for e in snug.values()))
+        classes = dict(nu_int_graph_classes(f, (0,2), [2,2]))
+        self.assertEqual(sorted(classes), [(0,-1), (1,-1), (1,0)])
+        self.assertEqual(classes[(1,0)], nug[(0,2), (2,2)])
+        self.assertEqual(nu_global_int_graph(f), gnug)
 
     def test_non_usual_conversion(self):
         ms = [2,1,3]
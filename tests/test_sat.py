@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Tests for dinpy."""
+
+import unittest
+from pysmt.shortcuts import And, Not, Or
+
+from dinpy.interaction_graphs import local_circuits
+from dinpy.find_din import boolean_map, fixed_point, solve, circuits, is_circuit
+from dinpy.find_din import network_cnf, variable_map, to_dimacs, count_models
+from dinpy.sat_din import solve_sat, models_to_bns
+
+
+class TestSat(unittest.TestCase):
+    def test_dimacs(self):
+        n = 2
+        f = boolean_map(n)
+        vmap = variable_map(n)
+        self.assertEqual(vmap[1], ((0,0), 0))
+        self.assertEqual(vmap[8], ((1,1), 1))
+        self.assertEqual(network_cnf(f[(0,1)][1], n), ([(4,)], 8))
+        self.assertEqual(network_cnf(And(f[(0,1)][1], Not(f[(0,1)][1])), n), ([()], 8))
+        self.assertEqual(network_cnf(Or(f[(0,1)][1], Not(f[(0,1)][1])), n), ([], 8))
+        lines = to_dimacs(And(f[(0,0)][0], Or(f[(1,0)][1], f[(1,1)][0])), n).splitlines()
+        self.assertTrue(lines[0].startswith("p cnf "))
+        self.assertEqual(int(lines[0].split()[3]), len(lines)-1)
+        self.assertTrue(all(l.endswith(" 0") for l in lines[1:]))
+
+    def test_models_to_bns(self):
+        self.assertEqual(models_to_bns([[1,-2,-3,4,5,6,-7,-8,9]], 2),
+                         [{(0,0): (1,0), (0,1): (0,1), (1,0): (1,1), (1,1): (0,0)}])
+
+    def test_solve_sat(self):
+        n = 3
+        f = boolean_map(n)
+        formula = And([Not(is_circuit(f, x, c, -1)) for x in f for c in circuits(n)] +
+                      [fixed_point(f, (0,0,0)), fixed_point(f, (1,1,1)), fixed_point(f, (1,0,0)), Not(fixed_point(f, (0,1,0)))])
+        sols = list(solve_sat(formula, n, batch=100))
+        self.assertEqual(len(set(tuple(sorted(sol.items())) for sol in sols)), len(sols))
+        for sol in sols[:50]:
+            self.assertEqual(sol[(0,0,0)], (0,0,0))
+            self.assertNotEqual(sol[(0,1,0)], (0,1,0))
+            self.assertFalse(any(s==-1 for x in sol for c, s in local_circuits(sol)[x]))
+        self.assertEqual(len(sols), count_models(formula, n))
+        self.assertEqual(len(list(solve_sat(formula, n, max_models=5))), 5)
+        sols = list(solve_sat(formula, n, project=[(0,1,0)]))
+        self.assertEqual(sorted(sol[(0,1,0)] for sol in sols),
+                         sorted(sol[(0,1,0)] for sol in solve(formula, n, project=[(0,1,0)])))
+        self.assertEqual(list(solve_sat(And(f[(0,0,0)][0], Not(f[(0,0,0)][0])), n)), [])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSat)
+    unittest.TextTestRunner(verbosity=2).run(suite)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+
+"""Tests for dinpy."""
+
+import unittest
+
+from dinpy.input_din import read_truth_table, random_boolean_map
+from dinpy.din import attractors, fixed_points, is_trap_domain, reachable_attractors
+from dinpy.symbolic_din import SymbolicNetwork, symbolic_network, states_bdd, bdd_states, count_states
+from dinpy.symbolic_din import post_bdd, pre_bdd, reachable_bdd, fixed_points_bdd, is_trap_domain_bdd, attractors_bdd
+
+
+class TestSymbolic(unittest.TestCase):
+    def test_symbolic_network(self):
+        f = read_truth_table(["00 11", "01 01", "10 11", "11 10"])
+        sf = symbolic_network(f)
+        g = SymbolicNetwork(["x1 | !x2", "!x1 | !x2"], sf.bdd)
+        self.assertTrue(all(u == v for u, v in zip(sf.functions, g.functions)))
+        self.assertEqual(sorted(bdd_states(sf, states_bdd(sf, [(0,1), (1,0)]))), [(0,1), (1,0)])
+        self.assertEqual(count_states(sf, sf.bdd.true), 4)
+        self.assertEqual(sorted(bdd_states(sf, post_bdd(sf, states_bdd(sf, [(0,0)])))), [(0,1), (1,0)])
+        self.assertEqual(sorted(bdd_states(sf, pre_bdd(sf, states_bdd(sf, [(0,1)])))), [(0,0)])
+        self.assertEqual(sorted(bdd_states(sf, reachable_bdd(sf, states_bdd(sf, [(1,1)])))), [(1,0), (1,1)])
+        self.assertEqual(list(bdd_states(sf, fixed_points_bdd(sf))), [(0,1)])
+        self.assertTrue(is_trap_domain_bdd(sf, states_bdd(sf, [(1,0), (1,1)])))
+        self.assertFalse(is_trap_domain_bdd(sf, states_bdd(sf, [(1,0), (0,0)])))
+        with self.assertRaises(ValueError):
+            symbolic_network(read_truth_table(["0 1", "1 2", "2 0"]))
+
+    def test_random(self):
+        for f in [random_boolean_map(4) for i in range(10)]:
+            sf = symbolic_network(f)
+            self.assertEqual(sorted(bdd_states(sf, fixed_points_bdd(sf))), fixed_points(f))
+            attrs = sorted(sorted(bdd_states(sf, a)) for a in attractors_bdd(sf))
+            self.assertEqual(attrs, [sorted(a) for a in attractors(f)])
+            x = (0,1,1,0)
+            reached = states_bdd(sf, [x])
+            self.assertTrue(is_trap_domain(f, list(bdd_states(sf, reachable_bdd(sf, reached)))))
+            self.assertTrue(all(sf.bdd.let(dict(zip(sf.xs, map(bool, a.pop()))), reachable_bdd(sf, reached)) == sf.bdd.true
+                                for a in reachable_attractors(f, [x])))
+
+    def test_rules(self):
+        # positive ring: two fixed points, which are the attractors,
+        # and from a single 1 the reachable states are the arcs of 1s
+        n = 40
+        sf = SymbolicNetwork(["x{}".format(n)] + ["x{}".format(i) for i in range(1, n)])
+        self.assertEqual(sorted(bdd_states(sf, fixed_points_bdd(sf))), [(0,)*n, (1,)*n])
+        self.assertEqual(count_states(sf, reachable_bdd(sf, states_bdd(sf, [(1,)+(0,)*(n-1)]))), n*(n-1)+2)
+        self.assertEqual(sorted(count_states(sf, a) for a in attractors_bdd(sf)), [1, 1])
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(TestSymbolic)
+    unittest.TextTestRunner(verbosity=2).run(suite)